@@ -8,8 +8,6 @@
 # Created by Michael Abir (abir2@illinois.edu) on 08/28/2018
 # Modified by Rahul Kunji (rahulsk2@illinois.edu) on 01/16/2019
 
-import pygame
-
 # The agent is only used when a human player is used, and is therefore not annotated much
 class Agent():
     def __init__(self, pos, maze, blockSizeX, blockSizeY):
@@ -17,17 +15,19 @@ class Agent():
         self.col = pos[1]
         self.lastRow = None
         self.lastCol = None
+        self.left = []          # cells moved out of since the last update
         self.needsUpdate = True
         self.color = (255, 0, 0)
         self.maze = maze
         self.blockSizeX = blockSizeX
         self.blockSizeY = blockSizeY
 
+    # Returns the cells the agent moved out of since the last update, empty
+    # if it did not move
     def update(self):
-        if self.needsUpdate:
-            self.needsUpdate = False
-            position = (int(self.col * self.blockSizeX - self.blockSizeX / 2), int(self.row * self.blockSizeY - self.blockSizeY / 2))
-            pygame.display.flip()
+        left, self.left = self.left, []
+        self.needsUpdate = False
+        return left
 
     def canMoveRight(self):
         return self.maze.isValidMove(self.row, self.col + 1)
@@ -45,6 +45,7 @@ class Agent():
         if self.canMoveRight():
             self.lastRow = self.row
             self.lastCol = self.col
+            self.left.append((self.row, self.col))
             self.needsUpdate = True
             self.col += 1
         
@@ -52,6 +53,7 @@ class Agent():
         if self.canMoveLeft():
             self.lastRow = self.row
             self.lastCol = self.col
+            self.left.append((self.row, self.col))
             self.needsUpdate = True
             self.col -= 1
 
@@ -59,6 +61,7 @@ class Agent():
         if self.canMoveUp():
             self.lastRow = self.row
             self.lastCol = self.col
+            self.left.append((self.row, self.col))
             self.needsUpdate = True
             self.row -= 1
 
@@ -66,6 +69,7 @@ class Agent():
         if self.canMoveDown():
             self.lastRow = self.row
             self.lastCol = self.col
+            self.left.append((self.row, self.col))
             self.needsUpdate = True
             self.row += 1
 
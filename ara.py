@@ -0,0 +1,134 @@
+# ara.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains ARA*, anytime repairing A*. It runs weighted A* with f = g
++ w * h, starting from a high weight w that finds a path quickly, then lowers
+w and improves the path. Each round reuses the costs of the previous ones and
+only re-expands the cells whose cost went down, until w reaches 1 and the path
+is shortest, or the budget of milliseconds or expansions runs out.
+
+After every round the search yields (IMPROVED, bound, cost): the path of
+that cost is at most bound times longer than a shortest one. The bound
+is min(w, cost / the lowest g + h still open), so it often drops below w.
+"""
+
+import heapq
+import time
+
+from cellarrays import acquire, release
+from steps import EXPANDED, REACHED, IMPROVED, COUNTED
+
+INITIAL_WEIGHT = 3.0
+WEIGHT_STEP = 0.5
+
+# expansions between two reads of the clock
+DEADLINE_CHECK = 256
+
+# cell states, kept in the visited byte
+SEEN = 1            # g is known
+CLOSED = 3          # expanded in the current round
+
+# yields the expansion events of ARA* on maze and its bound after every
+# round, returns path, num_states_explored. with a budget, the best path found
+# when it ran out is returned; [] if none was found by then
+def ara_steps(maze, deadline_ms=None, max_expansions=None, weight=INITIAL_WEIGHT):
+    goalRow, goalCol = maze.getObjectives()[0]
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    start = maze.getStart()
+    start = start[0] * cols + start[1]
+    goal = goalRow * cols + goalCol
+    deadline = None if deadline_ms is None else time.perf_counter() + deadline_ms / 1000.0
+    arrays = acquire(maze.rows * cols)
+    try:
+        state, parent, g = arrays.visited, arrays.parent, arrays.cost
+        state[start] = SEEN
+        g[start] = 0
+        parent[start] = -1
+        discovered = 1
+        startRow, startCol = divmod(start, cols)
+        frontier = [(weight * (abs(startRow - goalRow) + abs(startCol - goalCol)), 0, start)]
+        inconsistent = set()    # cells whose cost went down after they were closed
+        closed = []
+        expanded = 0
+        heuristics = 1
+        stopped = False
+        while True:
+            while frontier:
+                if state[goal] and g[goal] <= frontier[0][0]:
+                    break
+                if (max_expansions is not None and expanded >= max_expansions) or (
+                        deadline is not None and expanded % DEADLINE_CHECK == 0 and time.perf_counter() >= deadline):
+                    stopped = True
+                    break
+                key, negative, current = heapq.heappop(frontier)
+                if state[current] != SEEN or -negative != g[current]:
+                    continue    # closed this round, or pushed again at a lower cost
+                state[current] = CLOSED
+                closed.append(current)
+                expanded += 1
+                cost = g[current] + 1
+                pushed = []
+                for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                    if state[neighbor] and cost >= g[neighbor]:
+                        continue
+                    if not state[neighbor]:
+                        discovered += 1
+                    g[neighbor] = cost
+                    parent[neighbor] = current
+                    if state[neighbor] == CLOSED:
+                        inconsistent.add(neighbor)
+                        continue
+                    state[neighbor] = SEEN
+                    row, col = divmod(neighbor, cols)
+                    # ties go to the deeper cell
+                    heapq.heappush(frontier, (cost + weight * (abs(row - goalRow) + abs(col - goalCol)), -cost, neighbor))
+                    pushed.append(neighbor)
+                heuristics += len(pushed)
+                yield EXPANDED, current, pushed, len(frontier), discovered
+            if stopped or not state[goal]:
+                break
+
+            # the cells a later round may still improve, and the lowest cost a
+            # path through them could have
+            waiting = inconsistent.union(cell for key, negative, cell in frontier
+                                         if state[cell] == SEEN and -negative == g[cell])
+            lower = g[goal]
+            for cell in waiting:
+                row, col = divmod(cell, cols)
+                lower = min(lower, g[cell] + abs(row - goalRow) + abs(col - goalCol))
+            heuristics += len(waiting)
+            bound = min(weight, g[goal] / lower) if lower > 0 else 1.0
+            yield IMPROVED, bound, g[goal]
+            if bound <= 1.0:
+                break
+            weight = max(1.0, weight - WEIGHT_STEP)
+            for cell in closed:
+                state[cell] = SEEN
+            closed = []
+            inconsistent = set()
+            frontier = []
+            for cell in waiting:
+                row, col = divmod(cell, cols)
+                frontier.append((g[cell] + weight * (abs(row - goalRow) + abs(col - goalCol)), -g[cell], cell))
+            heuristics += len(waiting)
+            heapq.heapify(frontier)
+
+        yield COUNTED, {"neighbor_calls": expanded, "heuristic_calls": heuristics}
+        if not state[goal]:
+            return [], expanded
+        cells = []
+        cell = goal
+        while cell != -1:
+            cells.append(cell)
+            cell = parent[cell]
+        cells.reverse()
+        yield REACHED, (goalRow, goalCol)
+        return [maze.getCellPos(cell) for cell in cells], expanded
+    finally:
+        release(arrays)
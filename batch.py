@@ -0,0 +1,129 @@
+# batch.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains search_many, which answers many start/objective queries
+against one loaded Maze across a process pool. Where fork is available the
+workers inherit the maze copy-on-write instead of receiving a pickled copy per
+task; elsewhere each worker receives it once at startup. Queries that share a
+single goal are answered together from one reverse breadth first search.
+"""
+
+import os
+import multiprocessing
+
+from search import search
+from multidot import bfs_distances, leg_from_parents
+from resultcache import SHORTEST_METHODS
+
+# the maze each worker searches, inherited through fork or set by _init_worker
+_maze = None
+
+def _init_worker(maze):
+    global _maze
+    if maze is not None:
+        _maze = maze
+
+# runs one query on maze, leaving its start and objectives as they were
+def run_query(maze, start, objectives, method):
+    saved_start, saved_objectives = maze.getStart(), maze.getObjectives()
+    try:
+        maze.setStart(start)
+        maze.setObjectives(objectives)
+        return search(maze, method)
+    finally:
+        maze.setStart(saved_start)
+        maze.setObjectives(saved_objectives)
+
+# answers every (index, start) in members with a shortest path to goal from
+# one breadth first search grown backwards from goal. the cells it expanded
+# are split between the members as evenly as they go, so that the states
+# explored over a batch add up to the work done
+def run_shared_goal(maze, goal, members):
+    goal_cell = maze.getCellId(goal[0], goal[1])
+    start_cells = [maze.getCellId(start[0], start[1]) for index, start in members]
+    dist, parent, expanded = bfs_distances(maze, goal_cell, start_cells)
+    share, extra = divmod(expanded, len(members))
+    results = []
+    for position, ((index, start), cell) in enumerate(zip(members, start_cells)):
+        explored = share + (position < extra)
+        if dist[cell] < 0:
+            results.append((index, [], explored))
+            continue
+        leg = leg_from_parents(parent, goal_cell, cell)
+        path = [maze.getCellPos(step) for step in reversed(leg)]
+        path.append(goal)
+        results.append((index, path, explored))
+    return results
+
+def _run_task(task):
+    if task[0] == "shared":
+        return run_shared_goal(_maze, task[1], task[2])
+    index, start, objectives, method = task[1:]
+    path, num_states_explored = run_query(_maze, start, objectives, method)
+    return [(index, path, num_states_explored)]
+
+# queries are (start, objectives) pairs where objectives is one (row, col)
+# goal or a list of them
+def _normalize(query):
+    start, objectives = query
+    if len(objectives) == 2 and isinstance(objectives[0], int):
+        objectives = [objectives]
+    return tuple(start), [tuple(objective) for objective in objectives]
+
+# groups queries into tasks, merging queries that share a single goal
+def plan_tasks(queries, method, share_goals=True):
+    tasks = []
+    by_goal = {}
+    for index, query in enumerate(queries):
+        start, objectives = _normalize(query)
+        if share_goals and method in SHORTEST_METHODS and len(objectives) == 1:
+            by_goal.setdefault(objectives[0], []).append((index, start))
+        else:
+            tasks.append(("single", index, start, objectives, method))
+    for goal, members in by_goal.items():
+        if len(members) == 1:
+            index, start = members[0]
+            tasks.append(("single", index, start, [goal], method))
+        else:
+            tasks.append(("shared", goal, members))
+    return tasks
+
+# Runs every query against maze with the given search method on a pool of
+# workers (os.cpu_count() by default, in-process for workers=1). yields
+# (index, path, num_states_explored) tuples, index being the position of the
+# query in queries, as soon as each one finishes. queries answered together
+# from a shared goal report their share of its states, see run_shared_goal
+def search_many(maze, queries, method="bfs", workers=None, share_goals=True):
+    global _maze
+    tasks = plan_tasks(queries, method, share_goals)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(tasks))
+    if workers <= 1:
+        for task in tasks:
+            if task[0] == "shared":
+                yield from run_shared_goal(maze, task[1], task[2])
+            else:
+                index, start, objectives, method = task[1:]
+                path, num_states_explored = run_query(maze, start, objectives, method)
+                yield index, path, num_states_explored
+        return
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        _maze = maze
+        initargs = (None,)
+    else:
+        context = multiprocessing.get_context()
+        initargs = (maze,)
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+            for results in pool.imap_unordered(_run_task, tasks):
+                yield from results
+    finally:
+        _maze = None
@@ -0,0 +1,271 @@
+# benchmark.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the benchmark suite for the search methods. It runs every
+method in search.methods on every maze in maps/ (and optionally on generated
+large mazes), recording median and p95 wall time, states explored and peak
+traced memory. Results can be saved as a baseline, and a later run compared
+against it fails when a method got slower, explored more or used more memory
+than the baseline by more than the threshold.
+
+    python benchmark.py --save-baseline baseline.json
+    python benchmark.py --baseline baseline.json --threshold 1.25
+
+With --scaling it instead measures how the methods scale: it generates mazes
+of every size and dot count with mazegen and reports wall time and peak
+memory against the number of cells and of dots, with the exponent of the
+growth in cells, and plots them if matplotlib is installed:
+
+    python benchmark.py --scaling 100x100 300x300 1000x1000 --dots 1 4 16 --plot scaling.png
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cellarrays
+from maze import Maze
+import mazegen
+from search import methods, options_for
+from frontier import FRONTIERS, TIES
+
+# writes a bordered maze of the given size with walls scattered at density
+# and the start and one objective in opposite corners
+def generate_maze(filename, rows, cols, density=0.2, seed=0):
+    rng = random.Random(seed)
+    with open(filename, "w") as f:
+        for row in range(rows):
+            line = []
+            for col in range(cols):
+                if row in (0, rows - 1) or col in (0, cols - 1):
+                    line.append('%')
+                elif (row, col) == (1, 1):
+                    line.append('P')
+                elif (row, col) == (rows - 2, cols - 2):
+                    line.append('.')
+                else:
+                    line.append('%' if rng.random() < density else ' ')
+            f.write(''.join(line) + '\n')
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+# times method on a freshly loaded copy of the maze repeat times, then runs it
+# once more under tracemalloc for the peak memory, with the pool of cell
+# arrays emptied so that the arrays it needs are counted. options go to the
+# method if it takes them
+def measure(filename, method, repeat, options=None):
+    options = options_for(method, options or {})
+    times = []
+    for i in range(repeat):
+        maze = Maze(filename)
+        start = time.perf_counter()
+        path, statesExplored = methods[method](maze, **options)
+        times.append(time.perf_counter() - start)
+    maze = Maze(filename)
+    cellarrays.clear_pool()
+    tracemalloc.start()
+    try:
+        methods[method](maze, **options)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "median": statistics.median(times),
+        "p95": percentile(times, 0.95),
+        "states_explored": statesExplored,
+        "path_length": len(path),
+        "peak_memory": peak,
+    }
+
+# returns {"maze:method": result} for every maze file and method
+def run_suite(filenames, searchMethods, repeat, log=sys.stderr, options=None):
+    results = {}
+    for filename in filenames:
+        for method in searchMethods:
+            key = "%s:%s" % (os.path.basename(filename), method)
+            try:
+                result = measure(filename, method, repeat, options)
+            except Exception as e:
+                results[key] = {"error": repr(e)}
+                log.write("%-32s failed: %r\n" % (key, e))
+                continue
+            results[key] = result
+            log.write("%-32s median %8.4fs  p95 %8.4fs  states %8d  peak %8.1fKB\n" % (
+                key, result["median"], result["p95"], result["states_explored"], result["peak_memory"] / 1024))
+    return results
+
+# returns a description of every metric that regressed past threshold times
+# its baseline value. timings below min_time are too noisy to compare
+def find_regressions(results, baseline, threshold, min_time=0.01):
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline or "error" in result or "error" in baseline[key]:
+            continue
+        before = baseline[key]
+        for metric in ("median", "p95", "states_explored", "peak_memory"):
+            if metric in ("median", "p95") and before[metric] < min_time:
+                continue
+            if result[metric] > before[metric] * threshold:
+                regressions.append("%s %s: %s -> %s" % (key, metric, before[metric], result[metric]))
+    return regressions
+
+# measures every method on a generated maze of every size and dot count.
+# returns a list of results, each with its method, cells and dots
+def run_scaling(directory, sizes, dotCounts, searchMethods, repeat, kind="braided", seed=0, log=sys.stderr, options=None):
+    results = []
+    for rows, cols in sizes:
+        for dots in dotCounts:
+            filename = os.path.join(directory, "%s%dx%d-%d.txt" % (kind, rows, cols, dots))
+            mazegen.generate(filename, rows, cols, kind, dots, seed)
+            for method in searchMethods:
+                key = "%dx%d %d dots:%s" % (rows, cols, dots, method)
+                try:
+                    result = measure(filename, method, repeat, options)
+                except Exception as e:
+                    log.write("%-32s failed: %r\n" % (key, e))
+                    continue
+                result.update(method=method, cells=rows * cols, dots=dots)
+                results.append(result)
+                log.write("%-32s median %8.4fs  states %8d  peak %8.1fKB\n" % (
+                    key, result["median"], result["states_explored"], result["peak_memory"] / 1024))
+            os.remove(filename)
+    return results
+
+# the least squares slope of log(metric) over log(cells) for method at dots,
+# i.e. k in metric ~ cells ** k. None with fewer than two sizes
+def growth_exponent(results, method, dots, metric="median"):
+    points = [(math.log(result["cells"]), math.log(result[metric])) for result in results
+              if result["method"] == method and result["dots"] == dots and result[metric] > 0]
+    if len(points) < 2:
+        return None
+    meanX = statistics.mean(x for x, y in points)
+    meanY = statistics.mean(y for x, y in points)
+    spread = sum((x - meanX) ** 2 for x, y in points)
+    if spread == 0:
+        return None
+    return sum((x - meanX) * (y - meanY) for x, y in points) / spread
+
+def print_scaling(results, out=sys.stdout):
+    out.write("%-10s %10s %6s %10s %10s %12s\n" % ("method", "cells", "dots", "median s", "peak KB", "states"))
+    for result in sorted(results, key=lambda result: (result["method"], result["dots"], result["cells"])):
+        out.write("%-10s %10d %6d %10.4f %10.1f %12d\n" % (result["method"], result["cells"], result["dots"],
+                  result["median"], result["peak_memory"] / 1024, result["states_explored"]))
+    out.write("\ngrowth in cells, time ~ cells^k and memory ~ cells^k:\n")
+    for method in sorted(set(result["method"] for result in results)):
+        for dots in sorted(set(result["dots"] for result in results if result["method"] == method)):
+            seconds, memory = growth_exponent(results, method, dots), growth_exponent(results, method, dots, "peak_memory")
+            if seconds is not None:
+                out.write("%-10s %6d dots  time k=%.2f  memory k=%.2f\n" % (method, dots, seconds, memory or 0.0))
+
+# plots time and memory against cells, one line per method and dot count,
+# and against dots at the largest size
+def plot_scaling(results, filename):
+    try:
+        import matplotlib
+    except ImportError:
+        sys.exit("plotting needs matplotlib, e.g. pip install matplotlib")
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    figure, axes = plt.subplots(2, 2, figsize=(12, 9))
+    largest = max(result["cells"] for result in results)
+    for row, metric, label in ((0, "median", "median seconds"), (1, "peak_memory", "peak bytes")):
+        for method in sorted(set(result["method"] for result in results)):
+            for dots in sorted(set(result["dots"] for result in results)):
+                points = sorted((result["cells"], result[metric]) for result in results
+                                if result["method"] == method and result["dots"] == dots)
+                if points:
+                    axes[row][0].plot(*zip(*points), marker="o", label="%s, %d dots" % (method, dots))
+            points = sorted((result["dots"], result[metric]) for result in results
+                            if result["method"] == method and result["cells"] == largest)
+            if points:
+                axes[row][1].plot(*zip(*points), marker="o", label=method)
+        axes[row][0].set(xscale="log", yscale="log", xlabel="cells", ylabel=label)
+        axes[row][1].set(xscale="log", yscale="log", xlabel="dots at %d cells" % largest, ylabel=label)
+        for axis in axes[row]:
+            axis.legend(fontsize="small")
+    figure.tight_layout()
+    figure.savefig(filename)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='CS440 MP1 search benchmarks')
+    parser.add_argument('--maps', dest="maps", type=str, default = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps"),
+                        help='directory of maze files - default maps/')
+    parser.add_argument('--method', dest="search", type=str, nargs='+', default = list(methods),
+                        choices = list(methods), metavar = "METHOD",
+                        help='search methods to run - default all')
+    parser.add_argument('--frontier', dest="frontier", type=str, default = "heap", choices = list(FRONTIERS),
+                        help='priority queue of astar and greedy - default heap')
+    parser.add_argument('--tie', dest="tie", type=str, default = "position", choices = list(TIES),
+                        help='tie-breaking of astar and greedy - default position')
+    parser.add_argument('--repeat', dest="repeat", type=int, default = 5,
+                        help='timed runs per maze and method - default 5')
+    parser.add_argument('--generate', dest="generate", type=str, nargs='*', default = [],
+                        help='also run on generated mazes of the given sizes, e.g. 200x200')
+    parser.add_argument('--scaling', dest="scaling", type=str, nargs='+', default = None,
+                        help='measure scaling on generated mazes of these sizes instead, e.g. 100x100 1000x1000')
+    parser.add_argument('--dots', dest="dots", type=int, nargs='+', default = [1],
+                        help='dot counts of the scaling mazes - default 1')
+    parser.add_argument('--kind', dest="kind", type=str, default = "braided", choices = mazegen.KINDS,
+                        help='layout of the scaling mazes - default braided')
+    parser.add_argument('--seed', dest="seed", type=int, default = 0,
+                        help='random seed of the scaling mazes - default 0')
+    parser.add_argument('--plot', dest="plot", type=str, default = None,
+                        help='plot the scaling results into this image file (needs matplotlib)')
+    parser.add_argument('--save-baseline', dest="save_baseline", type=str, default = None,
+                        help='write the results to this baseline file')
+    parser.add_argument('--baseline', dest="baseline", type=str, default = None,
+                        help='compare against this baseline file and fail on regressions')
+    parser.add_argument('--threshold', dest="threshold", type=float, default = 1.25,
+                        help='allowed ratio to the baseline before a metric counts as a regression - default 1.25')
+    parser.add_argument('--min-time', dest="min_time", type=float, default = 0.01,
+                        help='baseline timings below this many seconds are too noisy to compare - default 0.01')
+
+    args = parser.parse_args()
+    if args.scaling is not None:
+        sizes = [tuple(int(n) for n in size.lower().split("x")) for size in args.scaling]
+        with tempfile.TemporaryDirectory() as directory:
+            results = run_scaling(directory, sizes, args.dots, args.search, args.repeat, args.kind, args.seed,
+                                  options={"frontier": args.frontier, "tie": args.tie})
+        print_scaling(results)
+        if args.plot is not None:
+            plot_scaling(results, args.plot)
+        sys.exit(0)
+
+    filenames = sorted(glob.glob(os.path.join(args.maps, "*.txt")))
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.generate:
+            rows, cols = (int(n) for n in size.lower().split("x"))
+            filename = os.path.join(directory, "generated%dx%d.txt" % (rows, cols))
+            generate_maze(filename, rows, cols)
+            filenames.append(filename)
+        results = run_suite(filenames, args.search, args.repeat,
+                            options={"frontier": args.frontier, "tie": args.tie})
+
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.threshold, args.min_time)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+        print("no regressions against", args.baseline)
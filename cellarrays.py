@@ -0,0 +1,59 @@
+# cellarrays.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains CellArrays, the per-cell state the searches in search.py
+run on: one visited byte and an int32 parent and cost per cell id
+(row * cols + col), about 9 bytes per cell where a dict of position tuples
+takes well over a hundred. Arrays are pooled by grid size, so later legs and
+queries on a maze of the same size reuse them instead of allocating.
+"""
+
+from array import array
+from collections import OrderedDict
+
+# grid sizes whose released arrays are kept, and how many per size
+POOL_SIZES = 4
+POOL_DEPTH = 2
+
+class CellArrays:
+    def __init__(self, size):
+        self.size = size
+        self.visited = bytearray(size)
+        self.parent = array('i', [-1]) * size
+        self.cost = array('i', [0]) * size
+
+    # marks every cell unvisited. parent and cost are only meaningful for
+    # visited cells, so they are left as they are
+    def clear(self):
+        self.visited[:] = bytes(self.size)
+
+# released arrays, by grid size, least recently released first
+_free = OrderedDict()
+
+# Returns cleared arrays for a grid of size cells, reusing released ones
+def acquire(size):
+    free = _free.get(size)
+    if free:
+        arrays = free.pop()
+        arrays.clear()
+        return arrays
+    return CellArrays(size)
+
+# Hands arrays back to the pool once the search using them is done
+def release(arrays):
+    free = _free.pop(arrays.size, [])
+    if len(free) < POOL_DEPTH:
+        free.append(arrays)
+    _free[arrays.size] = free
+    while len(_free) > POOL_SIZES:
+        _free.popitem(last=False)
+
+# Drops every released array, so that the next searches allocate their own,
+# e.g. for measuring the memory a search needs from cold
+def clear_pool():
+    _free.clear()
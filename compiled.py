@@ -0,0 +1,159 @@
+# compiled.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the compile step for maze files. A compiled maze (.mazeb)
+holds the dimensions, start and objectives, the walls packed one bit per
+cell and optionally the neighbor table and the exact distances between the
+start and every objective, so Maze loads it without parsing any text or
+building any tables. The format is described in maze.py, and Maze reads
+either kind of file.
+
+load_maze picks the compiled file next to a text maze when there is one and
+compiles it again first if the text changed since, judged by its size and
+modification time:
+
+    python compiled.py 'maps/*.txt' --distances
+    python mp1.py maps/bigMaze.txt      # now loads maps/bigMaze.mazeb
+"""
+
+import argparse
+import glob
+import os
+from array import array
+
+import distcache
+import multidot
+from maze import (Maze, COMPILED_MAGIC, COMPILED_HEADER, COMPILED_NEIGHBORS,
+                  COMPILED_DISTANCES, LENGTH)
+
+COMPILED_SUFFIX = '.mazeb'
+
+# wall bytes to '0' and '1' digits
+WALL_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+# Returns the compiled file belonging to a text maze file
+def compiled_path(filename):
+    return os.path.splitext(filename)[0] + COMPILED_SUFFIX
+
+# cells of the wall mask packed at once, a multiple of 8
+PACK_BLOCK = 1 << 16
+
+# packs a wall mask one bit per cell, the first cell in the lowest bit. the
+# mask is packed a block at a time, so no number or digit string grows with
+# the whole maze
+def pack_walls(walls):
+    packed = bytearray((len(walls) + 7) // 8)
+    for first in range(0, len(walls), PACK_BLOCK):
+        block = bytes(walls[first:first + PACK_BLOCK])
+        count = (len(block) + 7) // 8
+        bits = block.translate(WALL_DIGITS)[::-1]
+        packed[first // 8:first // 8 + count] = int(bits, 2).to_bytes(count, 'little')
+    return packed
+
+# Compiles the text maze filename into target (by default its compiled_path),
+# with the neighbor table and the objective distances if asked for. returns
+# target
+def compile_maze(filename, target=None, neighbors=True, distances=False):
+    target = target or compiled_path(filename)
+    stat = os.stat(filename)
+    maze = Maze(filename)
+    start = maze.getStart() or (-1, -1)
+    objectives = maze.getObjectives()
+    flags = (COMPILED_NEIGHBORS if neighbors else 0) | (COMPILED_DISTANCES if distances else 0)
+    # the source is found relative to the compiled file, so both can move together
+    source = os.path.relpath(os.path.abspath(filename), os.path.dirname(os.path.abspath(target))).encode()
+    parts = [
+        COMPILED_HEADER.pack(COMPILED_MAGIC, flags, maze.rows, maze.cols, start[0], start[1], len(objectives),
+                             stat.st_size, stat.st_mtime_ns, bytes.fromhex(maze.getContentHash())),
+        LENGTH.pack(len(source)), source,
+        array('i', [n for objective in objectives for n in objective]).tobytes(),
+        pack_walls(maze.getWallMask()),
+    ]
+    if neighbors:
+        offsets, targets = maze.getNeighborTable()
+        parts.extend((offsets.tobytes(), targets.tobytes()))
+    if distances:
+        cells = multidot.objective_cells(maze)
+        dist, legs, expanded = multidot.objective_distances(maze, cells)
+        entry = distcache.encode(maze, cells, dist, legs)
+        parts.extend((LENGTH.pack(len(entry)), entry))
+    tmp = '%s.%d.tmp' % (target, os.getpid())
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp, target)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return target
+
+# Returns (flags, source size, source mtime, source path) from the header of
+# a compiled file, or None if filename is not one
+def read_header(filename):
+    try:
+        with open(filename, 'rb') as f:
+            data = f.read(COMPILED_HEADER.size + LENGTH.size)
+            if len(data) < COMPILED_HEADER.size + LENGTH.size or data[:len(COMPILED_MAGIC)] != COMPILED_MAGIC:
+                return None
+            header = COMPILED_HEADER.unpack_from(data)
+            source = f.read(LENGTH.unpack_from(data, COMPILED_HEADER.size)[0]).decode()
+    except (OSError, ValueError):
+        return None
+    return header[1], header[7], header[8], os.path.join(os.path.dirname(filename), source)
+
+# Returns True if the text the compiled file was made from changed since. a
+# compiled file whose source is gone is never stale
+def is_stale(filename):
+    header = read_header(filename)
+    if header is None:
+        return True
+    flags, size, mtime, source = header
+    try:
+        stat = os.stat(source)
+    except OSError:
+        return False
+    return stat.st_size != size or stat.st_mtime_ns != mtime
+
+# Loads filename, a text or compiled maze. a text maze is loaded from its
+# compiled file when there is one, and either is compiled again first when
+# stale, keeping the sections it had
+def load_maze(filename):
+    header = read_header(filename)
+    if header is None:
+        target = compiled_path(filename)
+        if not os.path.exists(target):
+            return Maze(filename)
+        header = read_header(target)
+        source = filename
+    else:
+        target = filename
+        source = header[3]
+    if header is None or is_stale(target):
+        flags = header[0] if header is not None else COMPILED_NEIGHBORS
+        try:
+            compile_maze(source, target, flags & COMPILED_NEIGHBORS, flags & COMPILED_DISTANCES)
+        except OSError:
+            # e.g. a read-only directory: the text is loaded instead of a
+            # stale compiled file, unless the compiled file was asked for
+            if target != filename:
+                return Maze(filename)
+    return Maze(target)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='CS440 MP1 maze compiler')
+    parser.add_argument('filename', type=str, nargs='+',
+                        help='text maze files or globs to compile')
+    parser.add_argument('--no-neighbors', dest="neighbors", default = True, action = "store_false",
+                        help='leave out the neighbor table - default included')
+    parser.add_argument('--distances', default = False, action = "store_true",
+                        help='include the distances between the start and every objective - default left out')
+
+    args = parser.parse_args()
+    for pattern in args.filename:
+        for filename in sorted(glob.glob(pattern)) or [pattern]:
+            print(compile_maze(filename, neighbors=args.neighbors, distances=args.distances))
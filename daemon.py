@@ -0,0 +1,346 @@
+# daemon.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains a long-running local search service, so that a query does
+not pay for starting Python, importing pygame and loading the maze again.
+It listens on a Unix socket (or a localhost TCP port) with asyncio and takes
+one JSON request per line:
+
+    {"id": 1, "maze": "maps/bigMaze.txt", "method": "astar",
+     "start": [1, 1], "objectives": [[5, 7]], "options": {"tie": "high-g"}}
+
+and answers each with one line holding the same id and the result of
+search(), {"path": [[row, col], ...], "states_explored": n}, or "error".
+start, objectives and options may be left out to use those of the maze
+file. {"op": "metrics"} answers with latency percentiles, throughput, batch
+sizes and maze and result cache counters. Unlike other callers of search(),
+the service keeps a result cache by default.
+
+Mazes stay resident in an LRU keyed by content hash, loaded through
+compiled.load_maze, so precomputed structures such as the junction and
+cluster graphs survive between queries. Requests for the same maze arriving
+within a short window are run as one batch, identical queries once. Batches
+on large mazes or with many objectives go to a process pool, small ones run
+in the service itself, on a thread beside the event loop. A maze that fails
+to load in any way answers every request of its batch with an error.
+
+    python daemon.py --workers 4 &
+    python -c 'import daemon; print(daemon.query({"maze": "maps/bigMaze.txt", "method": "bfs"}))'
+"""
+
+import argparse
+import asyncio
+from collections import deque, OrderedDict
+import concurrent.futures
+import contextlib
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from compiled import load_maze
+import resultcache
+from search import search, methods, options_for
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "mp1-search.sock")
+
+# mazes kept resident, in the service and in every worker
+MAZE_CAPACITY = 16
+
+# seconds requests for the same maze are collected for before running them
+BATCH_WINDOW = 0.002
+
+# batches go to the worker pool from this many cells or objectives up
+HEAVY_CELLS = 250000
+HEAVY_OBJECTIVES = 8
+
+# requests the latency percentiles are taken over, and the seconds the
+# throughput is averaged over
+LATENCY_WINDOW = 1000
+THROUGHPUT_WINDOW = 60.0
+
+# Loaded mazes, least recently used first. a file is only hashed and loaded
+# again when its size or modification time changed
+class MazeStore:
+    def __init__(self, capacity=MAZE_CAPACITY):
+        self.capacity = capacity
+        self.mazes = OrderedDict()  # content hash -> Maze
+        self.files = {}             # filename -> (size, mtime, content hash)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, filename):
+        stat = os.stat(filename)
+        known = self.files.get(filename)
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns) and known[2] in self.mazes:
+            self.hits += 1
+            self.mazes.move_to_end(known[2])
+            return self.mazes[known[2]]
+        self.misses += 1
+        maze = load_maze(filename)
+        contentHash = maze.getContentHash()
+        self.files[filename] = (stat.st_size, stat.st_mtime_ns, contentHash)
+        # another file with the same content shares the resident maze
+        if contentHash in self.mazes:
+            self.mazes.move_to_end(contentHash)
+            return self.mazes[contentHash]
+        self.mazes[contentHash] = maze
+        while len(self.mazes) > self.capacity:
+            self.mazes.popitem(last=False)
+        return maze
+
+# Runs one request on maze through search(), with the start and objectives it
+# gives in place of the maze's own for its duration. returns the response
+def run_query(maze, request):
+    start, objectives = maze.getStart(), maze.getObjectives()
+    method = request.get("method", "bfs")
+    if method not in methods:
+        return {"error": "unknown method %r, one of %s" % (method, ", ".join(methods))}
+    try:
+        positions = ([request["start"]] if request.get("start") is not None else []) + (request.get("objectives") or [])
+        for position in positions:
+            if len(position) != 2 or not maze.isValidMove(position[0], position[1]):
+                return {"error": "position %s is outside the maze or a wall" % (position,)}
+        if request.get("start") is not None:
+            maze.setStart(tuple(request["start"]))
+        if request.get("objectives") is not None:
+            maze.setObjectives(request["objectives"])
+        path, statesExplored = search(maze, method, **options_for(method, request.get("options") or {}))
+        return {"path": [list(position) for position in path], "states_explored": statesExplored}
+    except Exception as e:
+        return {"error": repr(e)}
+    finally:
+        maze.setStart(start)
+        maze.setObjectives(objectives)
+
+# Runs a batch of requests on maze, identical ones once. returns the
+# responses in order
+def run_batch_on(maze, requests):
+    answered = {}
+    responses = []
+    for request in requests:
+        key = json.dumps([request.get(name) for name in ("method", "start", "objectives", "options")], sort_keys=True)
+        if key not in answered:
+            answered[key] = run_query(maze, request)
+        responses.append(answered[key])
+    return responses
+
+# the responses to a batch of count requests whose maze failed to load with e.
+# a bad file may fail in any way, from a missing file to undecodable text or
+# a truncated compiled header, and Maze exits on bad dimensions
+def load_failed(e, count):
+    return [{"error": "could not load maze: %s" % (str(e) or repr(e))}] * count
+
+# the mazes resident in a worker process
+_resident = MazeStore()
+
+# the worker side of a batch: loads filename through the worker's own store
+def run_batch(filename, requests):
+    try:
+        maze = _resident.get(filename)
+    except (Exception, SystemExit) as e:
+        return load_failed(e, len(requests))
+    return run_batch_on(maze, requests)
+
+class Metrics:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batchedRequests = 0
+        self.pooledBatches = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.finished = deque()     # monotonic times of the requests answered lately
+
+    def record(self, seconds, failed):
+        now = time.monotonic()
+        self.requests += 1
+        self.errors += 1 if failed else 0
+        self.latencies.append(seconds)
+        self.finished.append(now)
+        while self.finished[0] < now - THROUGHPUT_WINDOW:
+            self.finished.popleft()
+
+    def batch(self, size, pooled):
+        self.batches += 1
+        self.batchedRequests += size
+        self.pooledBatches += 1 if pooled else 0
+
+    def toDict(self, store):
+        ordered = sorted(self.latencies)
+        def percentile(fraction):
+            return 1000 * ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+        uptime = time.monotonic() - self.started
+        return {
+            "uptime": uptime,
+            "requests": self.requests,
+            "errors": self.errors,
+            "batches": self.batches,
+            "mean_batch": self.batchedRequests / self.batches if self.batches else 0.0,
+            "pooled_batches": self.pooledBatches,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99),
+                           "max": 1000 * ordered[-1] if ordered else 0.0},
+            "throughput": len(self.finished) / min(uptime, THROUGHPUT_WINDOW) if uptime > 0 else 0.0,
+            "mazes": {"resident": len(store.mazes), "hits": store.hits, "misses": store.misses},
+            "results": resultcache.default_cache.toDict() if resultcache.default_cache is not None else None,
+        }
+
+class SearchDaemon:
+    def __init__(self, workers=None, capacity=MAZE_CAPACITY, window=BATCH_WINDOW, resultBytes=resultcache.DEFAULT_MAX_BYTES):
+        self.store = MazeStore(capacity)
+        self.window = window
+        # the service and every worker keep their own result cache
+        resultcache.configure(resultBytes)
+        # workers=0 runs every batch in the service
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=resultcache.configure, initargs=(resultBytes,)) if workers != 0 else None
+        # loads mazes and runs the batches kept in the service, one at a time
+        # as they share the resident mazes, off the event loop so that other
+        # clients are still served meanwhile
+        self.inline = concurrent.futures.ThreadPoolExecutor(1)
+        self.pending = {}   # filename -> [(request, future)] waiting for the window to close
+        self.metrics = Metrics()
+
+    async def handle(self, reader, writer):
+        answers = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    # answered as soon as done, so one slow request does not
+                    # hold up those sent after it
+                    answer = asyncio.ensure_future(self.answer(line, writer))
+                    answers.add(answer)
+                    answer.add_done_callback(answers.discard)
+            if answers:
+                await asyncio.wait(answers)
+        finally:
+            writer.close()
+
+    async def answer(self, line, writer):
+        started = time.perf_counter()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("not an object")
+        except ValueError as e:
+            request, response = {}, {"error": "bad request: %s" % e}
+        else:
+            if request.get("op") == "metrics":
+                response = self.metrics.toDict(self.store)
+            elif not isinstance(request.get("maze"), str):
+                response = {"error": "bad request: no maze"}
+            else:
+                response = await self.submit(request)
+        if "id" in request:
+            response = dict(response, id=request["id"])
+        if request.get("op") != "metrics":
+            self.metrics.record(time.perf_counter() - started, "error" in response)
+        writer.write(json.dumps(response).encode() + b"\n")
+        with contextlib.suppress(ConnectionError):
+            await writer.drain()
+
+    # queues request into the batch for its maze. returns its response
+    def submit(self, request):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self.pending.setdefault(request["maze"], [])
+        batch.append((request, future))
+        if len(batch) == 1:
+            loop.call_later(self.window, lambda: asyncio.ensure_future(self.flush(request["maze"])))
+        return future
+
+    # runs the batch collected for filename. every request of it is answered,
+    # with an error if the batch failed
+    async def flush(self, filename):
+        batch = self.pending.pop(filename)
+        requests = [request for request, future in batch]
+        loop = asyncio.get_running_loop()
+        responses = []
+        try:
+            try:
+                maze = await loop.run_in_executor(self.inline, self.store.get, filename)
+            except (Exception, SystemExit) as e:
+                responses = load_failed(e, len(batch))
+            else:
+                heavy = maze.rows * maze.cols >= HEAVY_CELLS or any(
+                    len(request.get("objectives") or maze.getObjectives()) >= HEAVY_OBJECTIVES for request in requests)
+                pooled = heavy and self.pool is not None
+                self.metrics.batch(len(batch), pooled)
+                if pooled:
+                    responses = await loop.run_in_executor(self.pool, run_batch, filename, requests)
+                else:
+                    responses = await loop.run_in_executor(self.inline, run_batch_on, maze, requests)
+        except Exception as e:
+            responses = [{"error": repr(e)}] * len(batch)
+        finally:
+            for index, (request, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(responses[index] if index < len(responses) else {"error": "batch cancelled"})
+
+    async def serve(self, path=DEFAULT_SOCKET, port=None):
+        if port is not None:
+            server = await asyncio.start_server(self.handle, "127.0.0.1", port)
+        else:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            server = await asyncio.start_unix_server(self.handle, path)
+        # SIGTERM stops serving, so that the socket is removed below
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.close)
+        try:
+            async with server:
+                with contextlib.suppress(asyncio.CancelledError):
+                    await server.serve_forever()
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+            self.inline.shutdown(cancel_futures=True)
+            if port is None:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+
+# Sends request (a dict) to a running service and returns its response
+def query(request, path=DEFAULT_SOCKET, port=None):
+    if port is not None:
+        connection = socket.create_connection(("127.0.0.1", port))
+    else:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(path)
+    with connection, connection.makefile("rwb") as stream:
+        stream.write(json.dumps(request).encode() + b"\n")
+        stream.flush()
+        return json.loads(stream.readline())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='CS440 MP1 search service')
+    parser.add_argument('--socket', dest="socket", type=str, default = DEFAULT_SOCKET,
+                        help='Unix socket to listen on - default %s' % DEFAULT_SOCKET)
+    parser.add_argument('--port', dest="port", type=int, default = None,
+                        help='listen on this localhost TCP port instead of the socket - default not used')
+    parser.add_argument('--workers', dest="workers", type=int, default = None,
+                        help='processes for heavy batches, 0 runs everything in the service - default one per CPU')
+    parser.add_argument('--mazes', dest="mazes", type=int, default = MAZE_CAPACITY,
+                        help='mazes kept resident - default %d' % MAZE_CAPACITY)
+    parser.add_argument('--batch-window', dest="batch_window", type=float, default = BATCH_WINDOW * 1000,
+                        help='milliseconds requests for one maze are batched over - default %g' % (BATCH_WINDOW * 1000))
+    parser.add_argument('--result-cache-bytes', dest="result_cache_bytes", type=int,
+                        default = int(os.environ.get('MAZE_RESULT_CACHE_BYTES', resultcache.DEFAULT_MAX_BYTES)),
+                        help='size of the result cache, 0 turns it off - default %d' % resultcache.DEFAULT_MAX_BYTES)
+
+    args = parser.parse_args()
+    daemon = SearchDaemon(args.workers, args.mazes, args.batch_window / 1000, args.result_cache_bytes)
+    try:
+        asyncio.run(daemon.serve(args.socket, args.port))
+    except KeyboardInterrupt:
+        sys.exit(0)
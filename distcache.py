@@ -0,0 +1,178 @@
+# distcache.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the on-disk cache for objective distance matrices. An entry
+holds the exact distances and legs between the start and every objective of a
+maze, keyed by the sha256 of the maze file content and the cells involved, so
+editing the maze text always misses. Entries are zlib compressed binary files
+and the directory is kept under a size cap by evicting the least recently used
+entries.
+"""
+
+import os
+import struct
+import hashlib
+import zlib
+from array import array
+
+MAGIC = b'MDC1'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# header: magic, content hash, number of cells, number of columns
+HEADER = struct.Struct('<4s32sII')
+
+class DistanceCache:
+    def __init__(self, directory, maxBytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.maxBytes = maxBytes
+        os.makedirs(directory, exist_ok=True)
+
+    # Returns the path of the cache entry for the given maze and cell ids
+    def entryPath(self, maze, cells):
+        cellKey = hashlib.sha1(array('i', cells).tobytes()).hexdigest()[:16]
+        return os.path.join(self.directory, '%s-%s.mdc' % (maze.getContentHash(), cellKey))
+
+    # Returns (dist, legs) for the given maze and cell ids, or None on a miss.
+    # Corrupt or mismatched entries are removed and treated as misses
+    def load(self, maze, cells):
+        path = self.entryPath(maze, cells)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            entry = decode(data, maze, cells)
+        except (OSError, ValueError, struct.error, zlib.error):
+            entry = None
+        if entry is None:
+            if os.path.exists(path):
+                self.discard(path)
+            return None
+        try:
+            os.utime(path)      # the mtime is the recency used for eviction
+        except OSError:
+            pass
+        return entry
+
+    # Writes the entry for the given maze and cell ids, then evicts old entries
+    def store(self, maze, cells, dist, legs):
+        path = self.entryPath(maze, cells)
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(encode(maze, cells, dist, legs))
+            os.replace(tmp, path)
+        except OSError:
+            self.discard(tmp)
+            return
+        self.evict()
+
+    # Removes least recently used entries until the directory fits maxBytes
+    def evict(self):
+        evict_lru(self.directory, '.mdc', self.maxBytes)
+
+    def discard(self, path):
+        discard(path)
+
+def discard(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# Removes the least recently used (by mtime) files ending in suffix from
+# directory until they fit maxBytes
+def evict_lru(directory, suffix, maxBytes):
+    entries = []
+    total = 0
+    for name in os.listdir(directory):
+        if not name.endswith(suffix):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= maxBytes:
+            break
+        discard(path)
+        total -= size
+
+# legs are stored as one direction code per step (down, up, right, left),
+# which is what the neighbor table yields and compresses well
+def encode(maze, cells, dist, legs):
+    cols = maze.cols
+    codes = {cols: 0, -cols: 1, 1: 2, -1: 3}
+    count = len(cells)
+    body = array('i', cells)
+    for row in dist:
+        body.extend(row)
+    lengths = array('i')
+    steps = bytearray()
+    for i in range(count):
+        for j in range(count):
+            leg = legs[i][j]
+            if leg is None:
+                lengths.append(-1)
+                continue
+            lengths.append(len(leg))
+            previous = cells[i]
+            for cell in leg:
+                steps.append(codes[cell - previous])
+                previous = cell
+    payload = body.tobytes() + lengths.tobytes() + bytes(steps)
+    header = HEADER.pack(MAGIC, bytes.fromhex(maze.getContentHash()), count, cols)
+    return header + zlib.compress(payload)
+
+def decode(data, maze, cells):
+    magic, contentHash, count, cols = HEADER.unpack_from(data)
+    if magic != MAGIC or contentHash.hex() != maze.getContentHash() or cols != maze.cols or count != len(cells):
+        return None
+    payload = zlib.decompress(data[HEADER.size:])
+    ints = array('i')
+    ints.frombytes(payload[:4 * (count + count * count * 2)])
+    if list(ints[:count]) != list(cells):
+        return None
+    dist = [list(ints[count + i * count:count + (i + 1) * count]) for i in range(count)]
+    lengths = ints[count + count * count:]
+    steps = payload[4 * len(ints):]
+    deltas = (cols, -cols, 1, -1)
+    legs = []
+    position = 0
+    for i in range(count):
+        row = []
+        for j in range(count):
+            length = lengths[i * count + j]
+            if length < 0:
+                row.append(None)
+                continue
+            leg = array('i')
+            current = cells[i]
+            for code in steps[position:position + length]:
+                current += deltas[code]
+                leg.append(current)
+            position += length
+            row.append(leg)
+        legs.append(row)
+    return dist, legs
+
+default_cache = None
+
+# Enables the process-wide cache used by the multi-objective searches. With
+# no directory, MAZE_CACHE_DIR is used if set and the cache stays off otherwise
+def configure(directory=None, maxBytes=None):
+    global default_cache
+    directory = directory or os.environ.get('MAZE_CACHE_DIR')
+    if maxBytes is None:
+        maxBytes = int(os.environ.get('MAZE_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    default_cache = DistanceCache(directory, maxBytes) if directory else None
+    return default_cache
+
+configure()
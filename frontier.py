@@ -0,0 +1,131 @@
+# frontier.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the priority queues astar and greedy take their frontier
+from. Both order cells by an integer priority (f for astar, h for greedy) and
+break ties between equal priorities by one of TIES:
+
+    position    the smaller (row, col) first, as the searches always have
+    high-g      the cell furthest from the start first, i.e. the one closest
+                to the goal, which cuts through plateaus of equal f
+    lifo        the cell pushed last first
+
+HeapFrontier keeps one binary heap. BucketFrontier keeps a bucket per
+priority (Dial's algorithm), so finding the next cell costs O(1) amortized;
+with lifo ties a bucket is a plain stack and push and pop are O(1), while
+the other ties keep a small heap per bucket.
+"""
+
+import functools
+import heapq
+
+TIES = ("position", "high-g", "lifo")
+
+# more pushes than any search makes, so that lifo ranks stay positive
+LIFO_SPAN = 1 << 40
+
+# Ranks cells among cells of equal priority, lower ranks first. ranks are
+# below span
+class TieRanks:
+    def __init__(self, size, tie):
+        self.size = size
+        self.tie = tie
+        self.pushes = 0
+        self.span = {"position": 1, "high-g": size, "lifo": LIFO_SPAN}[tie]
+
+    # rank of a cell g steps from the start
+    def rank(self, g):
+        if self.tie == "high-g":
+            return self.size - 1 - g
+        self.pushes += 1
+        return LIFO_SPAN - self.pushes
+
+# Both frontiers hold integer keys (priority * span + rank) * size + cell, built
+# by the search with key(), so that with position ties (rank 0) a push is one
+# multiplication and an add. pop returns the key, whose cell is key % size
+class Frontier:
+    def __init__(self, size, tie="position"):
+        if tie not in TIES:
+            raise ValueError("unknown tie-breaking %r, one of %s" % (tie, ", ".join(TIES)))
+        self.size = size
+        # None for position ties, whose rank is always 0
+        self.ranks = None if tie == "position" else TieRanks(size, tie)
+        self.scale = size if self.ranks is None else self.ranks.span * size
+
+    # the key of cell, g steps from the start, with the given priority
+    def key(self, priority, cell, g=0):
+        if self.ranks is None:
+            return priority * self.scale + cell
+        return priority * self.scale + self.ranks.rank(g) * self.size + cell
+
+class HeapFrontier(Frontier):
+    def __init__(self, size, tie="position"):
+        Frontier.__init__(self, size, tie)
+        self.heap = []
+        # bound to the heap so that pushing and popping run entirely in C
+        self.push = functools.partial(heapq.heappush, self.heap)
+        self.pop = functools.partial(heapq.heappop, self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    def minPriority(self):
+        return self.heap[0] // self.scale
+
+class BucketFrontier(Frontier):
+    def __init__(self, size, tie="position"):
+        Frontier.__init__(self, size, tie)
+        self.lifo = tie == "lifo"
+        # buckets[priority] holds keys, as a stack for lifo and otherwise as a
+        # heap
+        self.buckets = []
+        self.cursor = 0     # no bucket below holds a key
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def push(self, key):
+        priority = key // self.scale
+        buckets = self.buckets
+        while len(buckets) <= priority:
+            buckets.append([])
+        if priority < self.cursor:
+            self.cursor = priority
+        self.count += 1
+        if self.lifo:
+            buckets[priority].append(key)
+        else:
+            heapq.heappush(buckets[priority], key)
+
+    # removes and returns the key of lowest priority
+    def pop(self):
+        buckets = self.buckets
+        while not buckets[self.cursor]:
+            self.cursor += 1
+        self.count -= 1
+        if self.lifo:
+            return buckets[self.cursor].pop()
+        return heapq.heappop(buckets[self.cursor])
+
+    def minPriority(self):
+        while not self.buckets[self.cursor]:
+            self.cursor += 1
+        return self.cursor
+
+FRONTIERS = {
+    "heap": HeapFrontier,
+    "bucket": BucketFrontier,
+}
+
+# Returns an empty frontier of the given kind, one of FRONTIERS, for a grid of
+# size cells
+def make_frontier(kind, size, tie="position"):
+    if kind not in FRONTIERS:
+        raise ValueError("unknown frontier %r, one of %s" % (kind, ", ".join(FRONTIERS)))
+    return FRONTIERS[kind](size, tie)
@@ -0,0 +1,106 @@
+# headless.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the headless batch runner behind mp1.py --headless. It
+runs every search method on every maze file across a process pool and writes
+one JSON line per (maze, method). With stats, each line also holds the
+SearchStats of the run under "stats", and runs under a budget hold the
+suboptimality bound they reached under "bound". Nothing here imports pygame.
+"""
+
+import contextlib
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from compiled import load_maze
+from instrument import profile_search
+from search import search, options_for, BUDGET_OPTIONS
+
+# expands glob patterns, keeping arguments that match nothing so that the
+# missing file is reported rather than silently skipped
+def expand_filenames(patterns):
+    filenames = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        filenames.extend(matches if matches else [pattern])
+    return filenames
+
+# loads one maze and runs each method on it. returns one record per method
+def run_maze(task):
+    filename, searchMethods, options, stats = task
+    try:
+        # Maze reports bad files on stdout, which carries the JSON lines here
+        with contextlib.redirect_stdout(sys.stderr):
+            maze = load_maze(filename)
+    except (Exception, SystemExit) as e:
+        # a bad file may fail in any way, from undecodable text to a
+        # truncated compiled header, and Maze exits on bad dimensions
+        return [{"maze": filename, "method": method, "error": "could not load maze: %s" % (str(e) or repr(e))}
+                for method in searchMethods]
+    records = []
+    for method in searchMethods:
+        methodOptions = options_for(method, options)
+        # the bound only comes with the events, which the plain searches skip
+        profiled = stats or any(name in methodOptions for name in BUDGET_OPTIONS)
+        start = time.perf_counter()
+        try:
+            if profiled:
+                path, statesExplored, searchStats = profile_search(maze, method, **methodOptions)
+            else:
+                path, statesExplored = search(maze, method, **methodOptions)
+        except Exception as e:
+            records.append({"maze": filename, "method": method, "error": repr(e)})
+            continue
+        record = {
+            "maze": filename,
+            "method": method,
+            "path_length": len(path),
+            "states_explored": statesExplored,
+            "wall_time": time.perf_counter() - start,
+            "path": [list(position) for position in path],
+        }
+        if profiled and searchStats.bound is not None:
+            record["bound"] = searchStats.bound
+        if stats:
+            record["stats"] = searchStats.toDict()
+        records.append(record)
+    return records
+
+# Runs searchMethods on every maze matched by patterns using workers processes
+# (os.cpu_count() by default) and writes JSON lines to output as results
+# arrive. options go to the methods that take them, and with stats every
+# record holds the statistics of its run. returns the number of records that
+# failed
+def run(patterns, searchMethods, workers=None, output=None, options=None, stats=False):
+    output = output or sys.stdout
+    tasks = [(filename, searchMethods, options or {}, stats) for filename in expand_filenames(patterns)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(tasks)))
+    if workers == 1:
+        results = map(run_maze, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(run_maze, tasks)
+    failures = 0
+    try:
+        for records in results:
+            for record in records:
+                failures += "error" in record
+                output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return failures
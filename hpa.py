@@ -0,0 +1,304 @@
+# hpa.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains ClusterGraph, the abstraction hierarchical pathfinding
+(HPA*) searches. The grid is split into square clusters of CLUSTER_SIZE cells.
+Every run of open cells along the border of two clusters gets one or two
+entrances, pairs of cells facing each other across the border, and the
+distances between the entrances of a cluster are precomputed with a search
+confined to it.
+
+A query connects the start and goal to the entrances of their clusters,
+runs astar over the entrances only and refines each step of the route into
+cells with a search inside one cluster, so its cost grows with the number of
+clusters crossed rather than with the area a plain astar would sweep. The
+paths are not always shortest, as an entrance stands for its whole run;
+they are usually within a few percent of it.
+
+The graph follows Maze.setWall through the maze's wall edit log. An edited
+cell only recomputes its own cluster, and the cluster across the border when
+the cell lies on one and the entrances there changed.
+"""
+
+from collections import deque
+import heapq
+import weakref
+
+from steps import EXPANDED, REACHED, COUNTED
+
+# cells per side of a cluster
+CLUSTER_SIZE = 16
+
+# border runs at least this long get an entrance at each end instead of one
+# in the middle
+ENTRANCE_SPLIT = 6
+
+class ClusterGraph:
+    def __init__(self, maze, clusterSize=CLUSTER_SIZE):
+        self.rows, self.cols = maze.rows, maze.cols
+        self.walls = maze.getWallMask()
+        self.clusterSize = clusterSize
+        self.clusterRows = (self.rows - 1) // clusterSize + 1
+        self.clusterCols = (self.cols - 1) // clusterSize + 1
+        self.build(maze.getWallVersion())
+
+    # computes every border and cluster from the current walls, which are
+    # those of wall version version of the maze
+    def build(self, version):
+        self.version = version
+        self.borders = {}       # (cluster, cluster right or below) -> entrance pairs
+        self.transitions = {}   # entrance cell -> the cells facing it across borders
+        self.intra = [None] * (self.clusterRows * self.clusterCols)
+        for cluster in range(len(self.intra)):
+            for other in self.bordering(cluster):
+                self.setBorder(cluster, other)
+        for cluster in range(len(self.intra)):
+            self.buildIntra(cluster)
+
+    def clusterOf(self, cell):
+        row, col = divmod(cell, self.cols)
+        return row // self.clusterSize * self.clusterCols + col // self.clusterSize
+
+    # the cells of cluster are rows top to bottom - 1, columns left to right - 1
+    def bounds(self, cluster):
+        clusterRow, clusterCol = divmod(cluster, self.clusterCols)
+        top, left = clusterRow * self.clusterSize, clusterCol * self.clusterSize
+        return top, left, min(self.rows, top + self.clusterSize), min(self.cols, left + self.clusterSize)
+
+    # the clusters right of and below cluster
+    def bordering(self, cluster):
+        clusterRow, clusterCol = divmod(cluster, self.clusterCols)
+        others = []
+        if clusterCol + 1 < self.clusterCols:
+            others.append(cluster + 1)
+        if clusterRow + 1 < self.clusterRows:
+            others.append(cluster + self.clusterCols)
+        return others
+
+    # Recomputes the entrances between cluster and other, right of or below
+    # it. returns True if they changed
+    def setBorder(self, cluster, other):
+        top, left, bottom, right = self.bounds(cluster)
+        cols, walls = self.cols, self.walls
+        if other % self.clusterCols != cluster % self.clusterCols:
+            facing = [(row * cols + right - 1, row * cols + right) for row in range(top, bottom)]
+        else:
+            facing = [((bottom - 1) * cols + col, bottom * cols + col) for col in range(left, right)]
+        pairs = []
+        run = []
+        for pair in facing + [None]:
+            if pair is not None and not walls[pair[0]] and not walls[pair[1]]:
+                run.append(pair)
+                continue
+            if len(run) >= ENTRANCE_SPLIT:
+                pairs.extend((run[0], run[-1]))
+            elif run:
+                pairs.append(run[len(run) // 2])
+            run = []
+        old = self.borders.get((cluster, other), [])
+        if old == pairs:
+            return False
+        transitions = self.transitions
+        for inside, outside in old:
+            transitions[inside].remove(outside)
+            transitions[outside].remove(inside)
+            for cell in (inside, outside):
+                if not transitions[cell]:
+                    del transitions[cell]
+        for inside, outside in pairs:
+            transitions.setdefault(inside, []).append(outside)
+            transitions.setdefault(outside, []).append(inside)
+        self.borders[(cluster, other)] = pairs
+        return True
+
+    # the entrance cells of cluster, all on its outline
+    def entrances(self, cluster):
+        top, left, bottom, right = self.bounds(cluster)
+        cols = self.cols
+        outline = set()
+        for col in range(left, right):
+            outline.update((top * cols + col, (bottom - 1) * cols + col))
+        for row in range(top, bottom):
+            outline.update((row * cols + left, row * cols + right - 1))
+        return sorted(cell for cell in outline if cell in self.transitions)
+
+    # precomputes the distances between the entrances of cluster
+    def buildIntra(self, cluster):
+        nodes = self.entrances(cluster)
+        intra = {}
+        for node in nodes:
+            distance, parent = self.clusterSearch(node, cluster)
+            intra[node] = [(other, distance[other]) for other in nodes if other != node and other in distance]
+        self.intra[cluster] = intra
+
+    # Breadth-first search from cell source that never leaves cluster, up to
+    # target if given. returns the distance and parent of every cell reached
+    def clusterSearch(self, source, cluster, target=-1):
+        top, left, bottom, right = self.bounds(cluster)
+        walls, cols = self.walls, self.cols
+        distance = {source: 0}
+        parent = {source: -1}
+        queue = deque([source])
+        while queue:
+            cell = queue.popleft()
+            if cell == target:
+                break
+            row, col = divmod(cell, cols)
+            steps = distance[cell] + 1
+            # down, up, right, left, the order of Maze.getNeighbors
+            for neighbor, inside in ((cell + cols, row + 1 < bottom), (cell - cols, row > top),
+                                     (cell + 1, col + 1 < right), (cell - 1, col > left)):
+                if inside and not walls[neighbor] and neighbor not in distance:
+                    distance[neighbor] = steps
+                    parent[neighbor] = cell
+                    queue.append(neighbor)
+        return distance, parent
+
+    # brings the graph up to date with the walls set on maze since it was built
+    def update(self, maze):
+        version = maze.getWallVersion()
+        if version == self.version:
+            return
+        edits = maze.getWallEdits(self.version)
+        if edits is None:
+            self.build(version)
+            return
+        self.version = version
+        size, clusterCols = self.clusterSize, self.clusterCols
+        dirty = set()
+        borders = set()
+        for cell in edits:
+            cluster = self.clusterOf(cell)
+            dirty.add(cluster)
+            row, col = divmod(cell, self.cols)
+            # a cell on the outline of its cluster changes the border beyond
+            if row % size == 0 and cluster >= clusterCols:
+                borders.add((cluster - clusterCols, cluster))
+            if row % size == size - 1 and cluster + clusterCols < len(self.intra):
+                borders.add((cluster, cluster + clusterCols))
+            if col % size == 0 and col > 0:
+                borders.add((cluster - 1, cluster))
+            if col % size == size - 1 and col + 1 < self.cols:
+                borders.add((cluster, cluster + 1))
+        for cluster, other in borders:
+            if self.setBorder(cluster, other):
+                dirty.update((cluster, other))
+        for cluster in dirty:
+            self.buildIntra(cluster)
+
+    # Yields an expansion event per entrance searched, returns the cell ids of
+    # a path from cell source to cell target ([] if there is none) and the
+    # number of entrances and cells expanded
+    def route_steps(self, source, target):
+        if self.walls[source] or self.walls[target]:
+            return [], 0
+        if source == target:
+            return [source], 0
+        sourceCluster = self.clusterOf(source)
+        targetCluster = self.clusterOf(target)
+        # connect source and target to the entrances of their clusters
+        sourceDistance, sourceParent = self.clusterSearch(source, sourceCluster)
+        targetDistance, targetParent = self.clusterSearch(target, targetCluster)
+        explored = len(sourceDistance) + len(targetDistance)
+        # the cells the searches inside clusters expanded, which yield no events
+        cells = explored
+        starts = [(node, sourceDistance[node]) for node in self.intra[sourceCluster] if node in sourceDistance]
+        if target in sourceDistance:
+            starts.append((target, sourceDistance[target]))
+        exits = {node: targetDistance[node] for node in self.intra[targetCluster] if node in targetDistance}
+
+        targetRow, targetCol = divmod(target, self.cols)
+        cols = self.cols
+        cost = {source: 0}
+        parent = {source: -1}
+        frontier = [(0, source)]
+        closed = set()
+        reads = heuristics = 0
+        while frontier:
+            f, node = heapq.heappop(frontier)
+            if node == target:
+                break
+            if node in closed:
+                continue
+            closed.add(node)
+            explored += 1
+            edges = starts if node == source else self.intra[self.clusterOf(node)].get(node, [])
+            edges = edges + [(across, 1) for across in self.transitions.get(node, ())]
+            if node in exits:
+                edges.append((target, exits[node]))
+            pushed = []
+            for neighbor, weight in edges:
+                g = cost[node] + weight
+                if g < cost.get(neighbor, float("inf")):
+                    cost[neighbor] = g
+                    parent[neighbor] = node
+                    row, col = divmod(neighbor, cols)
+                    heapq.heappush(frontier, (g + abs(row - targetRow) + abs(col - targetCol), neighbor))
+                    pushed.append(neighbor)
+            reads += 1
+            heuristics += len(pushed)
+            yield EXPANDED, node, pushed, len(frontier), len(cost)
+        if target not in parent:
+            yield COUNTED, {"pops": cells, "neighbor_calls": reads + cells, "heuristic_calls": heuristics}
+            return [], explored
+
+        route = [target]
+        while parent[route[-1]] != -1:
+            route.append(parent[route[-1]])
+        route.reverse()
+        # refine every step of the route into cells
+        path = [source]
+        for step, (first, second) in enumerate(zip(route, route[1:])):
+            if self.clusterOf(first) != self.clusterOf(second):
+                piece = [second]
+            elif step == 0:
+                piece = trace(sourceParent, second)[1:]
+            elif second == target:
+                piece = trace(targetParent, first)[::-1][1:]
+            else:
+                distance, stepParent = self.clusterSearch(first, self.clusterOf(first), second)
+                explored += len(distance)
+                cells += len(distance)
+                piece = trace(stepParent, second)[1:]
+            path.extend(piece)
+        yield COUNTED, {"pops": cells, "neighbor_calls": reads + cells, "heuristic_calls": heuristics}
+        return path, explored
+
+# the cells from the root of a search tree to cell, following parent until -1
+def trace(parent, cell):
+    cells = []
+    while cell != -1:
+        cells.append(cell)
+        cell = parent[cell]
+    cells.reverse()
+    return cells
+
+# cluster graphs, kept up to date through the wall edit log before reuse. a
+# graph holds no reference to its maze, so that the entry goes with the maze
+_graphs = weakref.WeakKeyDictionary()
+
+# Returns the ClusterGraph of maze, built on first use and brought up to date
+# with the walls set since on later ones
+def cluster_graph(maze):
+    graph = _graphs.get(maze)
+    if graph is None:
+        graph = _graphs[maze] = ClusterGraph(maze)
+    else:
+        graph.update(maze)
+    return graph
+
+# yields the expansion events of an HPA* search of maze, returns path,
+# num_states_explored, the entrances and cells expanded
+def hpa_steps(maze):
+    goal = maze.getObjectives()[0]
+    start = maze.getStart()
+    cells, explored = yield from cluster_graph(maze).route_steps(maze.getCellId(start[0], start[1]), maze.getCellId(goal[0], goal[1]))
+    if not cells:
+        return [], explored
+    yield REACHED, goal
+    return [maze.getCellPos(cell) for cell in cells], explored
@@ -0,0 +1,172 @@
+# instrument.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains SearchStats and the profiled runs that fill it the same
+way for every search method, whatever num_states_explored means for it:
+
+    pops             positions taken off the frontier and expanded
+    pushes           positions added to the frontier
+    peak_frontier    largest frontier seen
+    peak_visited     largest map of discovered positions seen
+    heuristic_calls  evaluations of a search heuristic
+    neighbor_calls   neighbor lists (or edge lists of an abstract graph) read
+    scanned          probe steps taken between expansions, as by the jump
+                     scans of jps. a cell probed by several scans counts
+                     once per scan, so this measures scan work, not cells
+    legs             (objective, seconds, pops) for every objective reached
+    bound            suboptimality bound an anytime search last reported
+
+pops, pushes and the peaks come from the EXPANDED events. The heuristic and
+neighbor calls are counted by the searches themselves and reported in
+COUNTED events, as is work done without EXPANDED events, such as the
+distance searches multi-objective astar plans its tour over. Sampling
+profilers and other observers attach through ProfilerHook.
+"""
+
+import time
+
+import search
+from steps import EXPANDED, REACHED, IMPROVED, COUNTED, PEAK_COUNTS, drain
+
+# the SearchStats attribute behind each name of a COUNTED event
+COUNTERS = {
+    "pops": "pops",
+    "pushes": "pushes",
+    "peak_frontier": "peakFrontier",
+    "peak_visited": "peakVisited",
+    "heuristic_calls": "heuristicCalls",
+    "neighbor_calls": "neighborCalls",
+    "scanned": "scanned",
+}
+
+class SearchStats:
+    def __init__(self, method=None):
+        self.method = method
+        self.pops = 0
+        self.pushes = 0
+        self.peakFrontier = 0
+        self.peakVisited = 0
+        self.heuristicCalls = 0
+        self.neighborCalls = 0
+        self.scanned = 0
+        self.legs = []
+        self.bound = None
+        self.seconds = 0.0
+
+    # adds the counts of a COUNTED event
+    def add(self, counts):
+        for name, value in counts.items():
+            attribute = COUNTERS[name]
+            if name in PEAK_COUNTS:
+                value = max(value, getattr(self, attribute))
+            else:
+                value += getattr(self, attribute)
+            setattr(self, attribute, value)
+
+    def toDict(self):
+        return {
+            "method": self.method,
+            "pops": self.pops,
+            "pushes": self.pushes,
+            "peak_frontier": self.peakFrontier,
+            "peak_visited": self.peakVisited,
+            "heuristic_calls": self.heuristicCalls,
+            "neighbor_calls": self.neighborCalls,
+            "scanned": self.scanned,
+            "bound": self.bound,
+            "seconds": self.seconds,
+            "legs": [{"objective": list(objective), "seconds": seconds, "pops": pops}
+                     for objective, seconds, pops in self.legs],
+        }
+
+    # the stats as lines of text, in the style of the results mp1.py prints
+    def report(self):
+        lines = [
+            "Pops: %d" % self.pops,
+            "Pushes: %d" % self.pushes,
+            "Peak Frontier: %d" % self.peakFrontier,
+            "Peak Visited: %d" % self.peakVisited,
+            "Heuristic Calls: %d" % self.heuristicCalls,
+            "Neighbor Calls: %d" % self.neighborCalls,
+            "Scan Steps: %d" % self.scanned,
+            "Search Time: %.6fs" % self.seconds,
+        ]
+        if self.bound is not None:
+            lines.append("Suboptimality Bound: %.3f" % self.bound)
+        for index, (objective, seconds, pops) in enumerate(self.legs):
+            lines.append("Leg %d to %s: %.6fs, %d pops" % (index + 1, objective, seconds, pops))
+        return "\n".join(lines)
+
+# Observer of a profiled search. sample is called every sample_interval
+# expansions with the cell id just expanded, e.g. for a sampling profiler to
+# record the stack. any method may be left as is
+class ProfilerHook:
+    def start(self, stats):
+        pass
+
+    def sample(self, stats, cell):
+        pass
+
+    def leg(self, stats, objective, seconds):
+        pass
+
+    def finish(self, stats):
+        pass
+
+# passes the events of steps through while recording them into stats. returns
+# the result of steps
+def instrument(steps, stats, hooks=(), sample_interval=1000):
+    for hook in hooks:
+        hook.start(stats)
+    started = legStarted = time.perf_counter()
+    legPops = 0
+    while True:
+        try:
+            event = next(steps)
+        except StopIteration as done:
+            result = done.value
+            break
+        if event[0] == EXPANDED:
+            stats.pops += 1
+            stats.pushes += len(event[2])
+            if event[3] > stats.peakFrontier:
+                stats.peakFrontier = event[3]
+            if event[4] > stats.peakVisited:
+                stats.peakVisited = event[4]
+            if hooks and stats.pops % sample_interval == 0:
+                for hook in hooks:
+                    hook.sample(stats, event[1])
+        elif event[0] == REACHED:
+            now = time.perf_counter()
+            stats.legs.append((event[1], now - legStarted, stats.pops - legPops))
+            for hook in hooks:
+                hook.leg(stats, event[1], now - legStarted)
+            legStarted = now
+            legPops = stats.pops
+        elif event[0] == IMPROVED:
+            stats.bound = event[1]
+        elif event[0] == COUNTED:
+            stats.add(event[1])
+        yield event
+    stats.seconds = time.perf_counter() - started
+    for hook in hooks:
+        hook.finish(stats)
+    return result
+
+# Yields the events of searchMethod on maze while counting them into stats.
+# options are passed on to the method. returns path, num_states_explored
+def profile_steps(maze, searchMethod, stats, hooks=(), sample_interval=1000, **options):
+    steps = search.search_steps(maze, searchMethod, **options)
+    return (yield from instrument(steps, stats, hooks, sample_interval))
+
+# Runs searchMethod on maze like search.search, returning path,
+# num_states_explored, stats
+def profile_search(maze, searchMethod, hooks=(), sample_interval=1000, **options):
+    stats = SearchStats(searchMethod)
+    path, num_states_explored = drain(profile_steps(maze, searchMethod, stats, hooks, sample_interval, **options))
+    return path, num_states_explored, stats
@@ -0,0 +1,158 @@
+# jps.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains Jump Point Search for 4-connected uniform cost grids.
+
+Among the many equal length paths through open space, only canonical ones are
+searched: a path runs vertically and may turn horizontal anywhere, but a
+horizontal run only turns vertical where it has to, i.e. where the cell beside
+the run opens up right after being walled. Vertical jumps therefore stop
+wherever a horizontal scan finds something, and horizontal jumps stop at goals
+and at those forced turns. A* runs over the jump points only and the final path
+is filled back in cell by cell.
+"""
+
+import heapq
+
+from steps import EXPANDED, REACHED, COUNTED, drain
+
+# (drow, dcol) of each direction
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+class JumpGrid:
+    def __init__(self, maze, goal):
+        self.rows = maze.rows
+        self.cols = maze.cols
+        self.walls = maze.getWallMask()
+        self.goal = goal
+        self.scanned = 0
+
+    def isOpen(self, row, col):
+        return 0 <= row < self.rows and 0 <= col < self.cols and not self.walls[row * self.cols + col]
+
+    # scans from (row, col) along the row in direction dcol. returns the first
+    # jump point reached, or None at a wall
+    def jumpHorizontal(self, row, col, dcol):
+        isOpen = self.isOpen
+        while True:
+            col += dcol
+            self.scanned += 1
+            if not isOpen(row, col):
+                return None
+            if (row, col) == self.goal:
+                return (row, col)
+            if (isOpen(row - 1, col) and not isOpen(row - 1, col - dcol)) or \
+               (isOpen(row + 1, col) and not isOpen(row + 1, col - dcol)):
+                return (row, col)
+
+    # scans from (row, col) along the column in direction drow. a cell is a
+    # jump point if a horizontal scan from it finds one
+    def jumpVertical(self, row, col, drow):
+        isOpen = self.isOpen
+        while True:
+            row += drow
+            self.scanned += 1
+            if not isOpen(row, col):
+                return None
+            if (row, col) == self.goal:
+                return (row, col)
+            if self.jumpHorizontal(row, col, 1) is not None or self.jumpHorizontal(row, col, -1) is not None:
+                return (row, col)
+
+    def jump(self, row, col, direction):
+        drow, dcol = direction
+        if drow:
+            return self.jumpVertical(row, col, drow)
+        return self.jumpHorizontal(row, col, dcol)
+
+    # directions to scan from a jump point reached moving in direction (None
+    # for the start)
+    def successors(self, row, col, direction):
+        if direction is None:
+            return DIRECTIONS
+        drow, dcol = direction
+        if drow:
+            return (direction, (0, 1), (0, -1))
+        forced = [direction]
+        for turn in (-1, 1):
+            if self.isOpen(row + turn, col) and not self.isOpen(row + turn, col - dcol):
+                forced.append((turn, 0))
+        return forced
+
+def manhattan(pos1, pos2):
+    return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+
+# fills in the straight runs between consecutive jump points
+def expand_jump_path(points):
+    path = [points[0]]
+    for (row, col), (next_row, next_col) in zip(points, points[1:]):
+        drow = (next_row > row) - (next_row < row)
+        dcol = (next_col > col) - (next_col < col)
+        while (row, col) != (next_row, next_col):
+            row += drow
+            col += dcol
+            path.append((row, col))
+    return path
+
+# yields an expansion event per jump point, returns path, num_states_explored
+# num_states_explored counts the jump points generated, the analogue of the
+# cells entered by astar. the steps the jumps took to find them are reported
+# as scanned in a COUNTED event; every cell of a vertical scan starts two
+# horizontal ones, so a cell is counted once for each scan that probes it
+def jps_steps(maze, goal=None):
+    start = maze.getStart()
+    if goal is None:
+        goal = maze.getObjectives()[0]
+    grid = JumpGrid(maze, goal)
+    # states are (position, direction it was reached in), as the successors
+    # of a jump point depend on how it was entered
+    start_state = (start, None)
+    costs = {start_state : 0}
+    parents = {start_state : None}
+    frontier = [(manhattan(start, goal), 0, start, None)]
+    closed = set()
+    found = None
+    reads = 0           # successor lists computed
+    heuristics = 1
+    while len(frontier) != 0:
+        f, g, current, direction = heapq.heappop(frontier)
+        state = (current, direction)
+        if state in closed:
+            continue
+        closed.add(state)
+        if current == goal:
+            found = state
+            yield REACHED, current
+            break
+        pushed = []
+        for step in grid.successors(current[0], current[1], direction):
+            point = grid.jump(current[0], current[1], step)
+            if point is None:
+                continue
+            next_state = (point, step)
+            cost = g + abs(point[0] - current[0]) + abs(point[1] - current[1])
+            if cost < costs.get(next_state, float("inf")):
+                costs[next_state] = cost
+                parents[next_state] = state
+                heapq.heappush(frontier, (cost + manhattan(point, goal), cost, point, step))
+                pushed.append(point[0] * grid.cols + point[1])
+        reads += 1
+        heuristics += len(pushed)
+        yield EXPANDED, current[0] * grid.cols + current[1], pushed, len(frontier), len(costs)
+    yield COUNTED, {"neighbor_calls": reads, "heuristic_calls": heuristics, "scanned": grid.scanned}
+    if found is None:
+        return [], len(costs)
+    points = []
+    while found is not None:
+        points.append(found[0])
+        found = parents[found]
+    return expand_jump_path(points[::-1]), len(costs)
+
+# return path, num_states_explored
+def jps(maze, goal=None):
+    return drain(jps_steps(maze, goal))
@@ -0,0 +1,272 @@
+# junctions.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains JunctionGraph, a Maze compiled into a weighted graph over
+its junctions. Dead-end trees are pruned away, every corridor of cells with
+exactly two open neighbors becomes one weighted edge between the junctions at
+its ends, and searches run over the junctions only.
+
+The graph does not depend on the start or the objectives, so one compiled
+graph answers any query on the maze: a query endpoint inside a pruned dead
+end climbs to the cell it hangs from, one inside a corridor enters the graph
+at both ends of it, and the route found is expanded back into cells.
+"""
+
+import heapq
+import weakref
+from array import array
+
+from steps import EXPANDED, REACHED, COUNTED
+
+class JunctionGraph:
+    def __init__(self, maze):
+        self.rows, self.cols = maze.rows, maze.cols
+        self.contentHash = maze.getContentHash()
+        offsets, targets = maze.getNeighborTable()
+        walls = maze.getWallMask()
+        size = self.rows * self.cols
+        self.offsets, self.targets = offsets, targets
+
+        # repeatedly remove open cells with at most one open neighbor left.
+        # toward[cell] is the neighbor a pruned cell hung from, -1 for the
+        # last cell of a component that was a tree
+        degree = array('i', [0]) * size
+        for cell in range(size):
+            if not walls[cell]:
+                degree[cell] = offsets[cell + 1] - offsets[cell]
+        self.pruned = pruned = bytearray(size)
+        self.toward = toward = array('i', [-1]) * size
+        stack = [cell for cell in range(size) if not walls[cell] and degree[cell] <= 1]
+        while stack:
+            cell = stack.pop()
+            if pruned[cell]:
+                continue
+            pruned[cell] = 1
+            for neighbor in targets[offsets[cell]:offsets[cell + 1]]:
+                if not pruned[neighbor]:
+                    toward[cell] = neighbor
+                    degree[neighbor] -= 1
+                    if degree[neighbor] <= 1:
+                        stack.append(neighbor)
+        self.degree = degree
+
+        # nodes are the remaining cells that are not plain corridor cells.
+        # chains[k] lists the corridor cells from chainEnds[k][0] to
+        # chainEnds[k][1], both ends excluded
+        self.chainOf = array('i', [-1]) * size
+        self.chainPos = array('i', [0]) * size
+        self.chains = []
+        self.chainEnds = []
+        self.edges = {}
+        for cell in range(size):
+            if not walls[cell] and not pruned[cell] and degree[cell] != 2:
+                self.edges[cell] = []
+        for node in list(self.edges):
+            self.traceChains(node)
+        # a loop of corridor cells without any junction gets one as a node
+        for cell in range(size):
+            if not walls[cell] and not pruned[cell] and cell not in self.edges and self.chainOf[cell] < 0:
+                self.edges[cell] = []
+                self.traceChains(cell)
+
+    # open, unpruned neighbors of cell
+    def coreNeighbors(self, cell):
+        pruned = self.pruned
+        return [neighbor for neighbor in self.targets[self.offsets[cell]:self.offsets[cell + 1]] if not pruned[neighbor]]
+
+    # follows every corridor leaving node that has not been traced yet and
+    # records it as an edge to the node at its other end
+    def traceChains(self, node):
+        for first in self.coreNeighbors(node):
+            if first in self.edges:
+                # adjacent nodes: an edge without corridor cells, added once
+                if node < first:
+                    self.addChain(node, first, [])
+                continue
+            if self.chainOf[first] >= 0:
+                continue
+            cells = []
+            previous, current = node, first
+            while current not in self.edges:
+                cells.append(current)
+                # a corridor cell has two core neighbors, go on through the
+                # one not come from
+                following = self.coreNeighbors(current)
+                previous, current = current, following[following[0] == previous]
+            self.addChain(node, current, cells)
+
+    def addChain(self, start, end, cells):
+        chain = len(self.chains)
+        self.chains.append(array('i', cells))
+        self.chainEnds.append((start, end))
+        for position, cell in enumerate(cells):
+            self.chainOf[cell] = chain
+            self.chainPos[cell] = position
+        weight = len(cells) + 1
+        self.edges[start].append((end, weight, chain, True))
+        if end != start:
+            self.edges[end].append((start, weight, chain, False))
+
+    # the cells of chain from one end to the other, excluding both ends
+    def chainCells(self, chain, forward):
+        cells = list(self.chains[chain])
+        return cells if forward else cells[::-1]
+
+    # Climbs from cell through pruned dead ends. returns the cells climbed
+    # (cell first) and the core cell reached, or None if cell lies in a
+    # component that was pruned entirely
+    def climb(self, cell):
+        climbed = []
+        while self.pruned[cell]:
+            climbed.append(cell)
+            cell = self.toward[cell]
+            if cell < 0:
+                return climbed, None
+        return climbed, cell
+
+    # Returns the ways core cell enters the graph as (node, steps, cells), the
+    # cells walked from cell to node excluding both
+    def entries(self, cell):
+        if cell in self.edges:
+            return [(cell, 0, [])]
+        chain = self.chainOf[cell]
+        position = self.chainPos[cell]
+        cells = self.chains[chain]
+        start, end = self.chainEnds[chain]
+        return [(start, position + 1, list(cells[position - 1::-1]) if position else []),
+                (end, len(cells) - position, list(cells[position + 1:]))]
+
+    def number_of_nodes(self):
+        return len(self.edges)
+
+    # yields an expansion event per junction, returns the cell ids of a
+    # shortest path from cell source to cell target ([] if there is none)
+    # and the number of junctions expanded
+    def route_steps(self, source, target):
+        sourceClimb, sourceCore = self.climb(source)
+        targetClimb, targetCore = self.climb(target)
+        # both in the same dead-end tree: the path turns at the first cell
+        # their climbs share
+        shared = set(targetClimb)
+        if targetCore is not None:
+            shared.add(targetCore)
+        for index, cell in enumerate(sourceClimb + ([sourceCore] if sourceCore is not None else [])):
+            if cell in shared:
+                turn = targetClimb.index(cell) if cell in targetClimb else len(targetClimb)
+                return sourceClimb[:index] + [cell] + targetClimb[:turn][::-1], 0
+        if sourceCore is None or targetCore is None:
+            return [], 0
+
+        # the cells from source into the graph and from the graph to target
+        head = sourceClimb + [sourceCore]
+        tail = [targetCore] + targetClimb[::-1]
+        best = float("inf")
+        bestPath = None
+        # both on one corridor: walking along it is a candidate
+        if sourceCore not in self.edges and self.chainOf[sourceCore] == self.chainOf[targetCore]:
+            cells = self.chains[self.chainOf[sourceCore]]
+            first, last = self.chainPos[sourceCore], self.chainPos[targetCore]
+            between = list(cells[first + 1:last]) if first <= last else list(cells[last + 1:first][::-1])
+            best = abs(first - last)
+            bestPath = head + between + tail
+
+        targetRow, targetCol = divmod(targetCore, self.cols)
+        exits = {}
+        for node, steps, cells in self.entries(targetCore):
+            if steps < exits.get(node, (float("inf"),))[0]:
+                exits[node] = (steps, cells[::-1])
+        cost = {}
+        parent = {}
+        frontier = []
+        for node, steps, cells in self.entries(sourceCore):
+            if steps < cost.get(node, float("inf")):
+                cost[node] = steps
+                parent[node] = (None, cells, True)
+                row, col = divmod(node, self.cols)
+                heapq.heappush(frontier, (steps + abs(row - targetRow) + abs(col - targetCol), node))
+        closed = set()
+        finish = None
+        expanded = 0
+        heuristics = len(frontier)
+        while frontier:
+            f, node = heapq.heappop(frontier)
+            if f >= best:
+                break
+            if node in closed:
+                continue
+            closed.add(node)
+            expanded += 1
+            if node in exits and cost[node] + exits[node][0] < best:
+                best = cost[node] + exits[node][0]
+                finish = node
+            pushed = []
+            for neighbor, weight, chain, forward in self.edges[node]:
+                g = cost[node] + weight
+                if g < cost.get(neighbor, float("inf")):
+                    cost[neighbor] = g
+                    parent[neighbor] = (node, chain, forward)
+                    row, col = divmod(neighbor, self.cols)
+                    heapq.heappush(frontier, (g + abs(row - targetRow) + abs(col - targetCol), neighbor))
+                    pushed.append(neighbor)
+            heuristics += len(pushed)
+            yield EXPANDED, node, pushed, len(frontier), len(cost)
+        # one edge list read per junction expanded
+        yield COUNTED, {"neighbor_calls": expanded, "heuristic_calls": heuristics}
+        if finish is None:
+            return (bestPath or []), expanded
+
+        # walk the parents back from finish, expanding every edge
+        pieces = [[finish] + exits[finish][1] + tail]
+        node = finish
+        while True:
+            previous, via, forward = parent[node]
+            if previous is None:
+                pieces.append(head + via)
+                break
+            pieces.append([previous] + self.chainCells(via, forward))
+            node = previous
+        path = []
+        for piece in reversed(pieces):
+            path.extend(piece)
+        # the head and tail already hold the endpoints when they are nodes
+        if path[0] != source or path[-1] != target:
+            raise AssertionError("junction route does not join its endpoints")
+        return dedupe(path), expanded
+
+# removes consecutive repeats, left where an endpoint is itself a node
+def dedupe(path):
+    result = []
+    for cell in path:
+        if not result or result[-1] != cell:
+            result.append(cell)
+    return result
+
+# compiled graphs, checked against the maze content before reuse. a graph
+# holds no reference to its maze, so that the entry goes with the maze
+_graphs = weakref.WeakKeyDictionary()
+
+# Returns the JunctionGraph of maze, compiling it on first use and again after
+# the maze changed
+def junction_graph(maze):
+    graph = _graphs.get(maze)
+    if graph is None or graph.contentHash != maze.getContentHash():
+        graph = JunctionGraph(maze)
+        _graphs[maze] = graph
+    return graph
+
+# yields the expansion events of a search over the junction graph of maze,
+# returns path, num_states_explored, the junctions expanded
+def junction_steps(maze):
+    goal = maze.getObjectives()[0]
+    graph = junction_graph(maze)
+    start = maze.getStart()
+    cells, expanded = yield from graph.route_steps(maze.getCellId(start[0], start[1]), maze.getCellId(goal[0], goal[1]))
+    if not cells:
+        return [], expanded
+    yield REACHED, goal
+    return [maze.getCellPos(cell) for cell in cells], expanded
@@ -14,7 +14,53 @@ a representation of the maze that is exposed through a simple interface.
 """
 
 import re
-import copy
+import io
+import os
+import mmap
+import struct
+import hashlib
+from array import array
+
+# a line holding only whitespace (such lines are skipped), and bytes that can
+# not be read as one character per byte
+BLANK_LINE = re.compile(rb'(?:\A|\n)[ \t\r\f\v]*(?:\n|[ \t\r\f\v]\Z)')
+NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+# rows are translated in chunks of about this many bytes
+CHUNK_BYTES = 1 << 22
+
+# Compiled maze files (written by compiled.py) start with COMPILED_MAGIC and
+# COMPILED_HEADER: magic, flags, rows, cols, start row and column (-1 if
+# none), number of objectives, size and mtime (ns) of the source text and its
+# sha256. Then follow the source path, the objectives, the packed wall bits
+# and, as flags say, the neighbor table and an objective distance entry
+COMPILED_MAGIC = b'MZB1'
+COMPILED_HEADER = struct.Struct('<4sIIIiiIQQ32s')
+COMPILED_NEIGHBORS = 1
+COMPILED_DISTANCES = 2
+LENGTH = struct.Struct('<I')
+
+# BIT_PLANES[k] translates a packed wall byte to its bit k, the wall byte of
+# the k-th of the 8 cells it holds
+BIT_PLANES = [bytes(byte >> k & 1 for byte in range(256)) for k in range(8)]
+
+# setWall edits remembered for getWallEdits; older ones are forgotten
+WALL_EDIT_LOG = 1 << 12
+
+# counts sub in data a chunk at a time, as mmap has no count
+def countBytes(data, sub):
+    total = 0
+    for start in range(0, len(data), CHUNK_BYTES):
+        total += data[start:start + CHUNK_BYTES].count(sub)
+        boundary = start + CHUNK_BYTES
+        if len(sub) > 1 and data[boundary - len(sub) + 1:boundary + len(sub) - 1].find(sub) >= 0:
+            total += 1
+    return total
+
+# a random-looking 128 bit key of a cell id; XORs of these identify a set of
+# changed cells whatever the order of the changes
+def editKey(cell):
+    return int.from_bytes(hashlib.blake2b(cell.to_bytes(8, 'little'), digest_size=16).digest(), 'little')
 
 class Maze:
     # Initializes the Maze object by reading the maze from a file
@@ -25,36 +71,208 @@ class Maze:
         self.__objectiveChar = '.'
         self.__start = None
         self.__objective = []
+        self.__raw = None
+        self.__cells = None
+        self.__adjOffsets = None
+        # cell ids changed by setWall, the first one being edit number
+        # __wallEditBase + 1
+        self.__wallEdits = []
+        self.__wallEditBase = 0
+        self.__embeddedDistances = None
+        # a compiled file stays mapped while its neighbor table is viewed
+        self.__mapped = None
+        # the XOR of the editKey of every cell whose wall setWall changed an
+        # odd number of times, i.e. of the cells that differ from the file
+        self.__wallDelta = 0
 
-        with open(filename) as f:
-            lines = f.readlines()
-
-        lines = list(filter(lambda x: not re.match(r'^\s*$', x), lines))
-        lines = [list(line.strip('\n')) for line in lines]
+        # the maze only keeps one byte per cell, the wall mask; the file is
+        # memory-mapped rather than read into lines
+        with open(filename, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+            try:
+                if data[:len(COMPILED_MAGIC)] == COMPILED_MAGIC:
+                    self.__loadCompiled(data)
+                else:
+                    self.__contentHash = hashlib.sha256(data).hexdigest()
+                    if not self.__loadUniform(data):
+                        self.__loadLines(data)
+            finally:
+                if size and self.__mapped is None:
+                    data.close()
 
-        self.rows = len(lines)
-        self.cols = len(lines[0])
-        self.mazeRaw = lines
-
-        if (len(self.mazeRaw) != self.rows) or (len(self.mazeRaw[0]) != self.cols):
+        if self.rows == 0 or self.cols == 0:
             print("Maze dimensions incorrect")
             raise SystemExit
             return
 
-        for row in range(len(self.mazeRaw)):
-            for col in range(len(self.mazeRaw[0])):
-                if self.mazeRaw[row][col] == self.__startChar:
-                    self.__start = (row, col)
-                elif self.mazeRaw[row][col] == self.__objectiveChar:
-                    self.__objective.append((row, col))
+        self.__loaded = (self.__start, self.__objective)
+        self.__objectiveSet = set(self.__objective)
+
+    # The fast path for the usual file, where every row has the same width
+    # and ends in the same line ending: row widths are checked with a strided
+    # slice, the wall mask is built by translating whole chunks of rows with
+    # the line endings deleted, and the start and objectives are found with
+    # byte searches. returns False if the file needs the line-by-line loader
+    def __loadUniform(self, data):
+        if len(data) == 0 or BLANK_LINE.search(data) or NON_ASCII.search(data):
+            return False
+        crlf = data.find(b'\r\n') >= 0
+        newline = b'\r\n' if crlf else b'\n'
+        if countBytes(data, b'\r') != (countBytes(data, b'\r\n') if crlf else 0):
+            return False        # lone carriage returns also end lines
+        width = data.find(newline)
+        if width < 0:
+            width = len(data)
+        stride = width + len(newline)
+        rows, last = divmod(len(data), stride)
+        if last not in (0, width):
+            return False
+        if last == width:
+            rows += 1           # no line ending after the last row
+        ends = rows if last == 0 else rows - 1
+        if countBytes(data, newline) != ends or data[width::stride].count(newline[:1]) != ends:
+            return False
+
+        self.rows = rows
+        self.cols = width
+        wallTable = self.__wallTable()
+        self.__walls = bytearray(rows * width)
+        chunkRows = max(1, CHUNK_BYTES // stride)
+        for row in range(0, rows, chunkRows):
+            chunk = data[row * stride:(row + chunkRows) * stride]
+            translated = chunk.translate(wallTable, newline)
+            self.__walls[row * width:row * width + len(translated)] = translated
+
+        position = data.rfind(self.__startChar.encode())
+        if position >= 0:
+            self.__start = divmod(position, stride)
+        objectiveByte = self.__objectiveChar.encode()
+        position = data.find(objectiveByte)
+        while position >= 0:
+            self.__objective.append(divmod(position, stride))
+            position = data.find(objectiveByte, position + 1)
+        return True
+
+    # Loads files with ragged rows, blank lines, mixed line endings or
+    # multi-byte characters with the same semantics as reading them as text
+    def __loadLines(self, data):
+        lines = io.TextIOWrapper(io.BytesIO(bytes(data))).readlines()
+        lines = [line.rstrip('\n') for line in lines if not re.match(r'^\s*$', line)]
+        self.rows = len(lines)
+        self.cols = len(lines[0]) if lines else 0
+        cols = self.cols
+        wallTable = self.__wallTable()
+        self.__walls = bytearray(self.rows * cols)
+        for row, line in enumerate(lines):
+            # rows shorter than the first are treated as open past their end
+            line = line[:cols].ljust(cols)
+            self.__walls[row * cols:(row + 1) * cols] = line.encode('latin-1', 'replace').translate(wallTable)
+            col = line.rfind(self.__startChar)
+            if col >= 0:
+                self.__start = (row, col)
+            col = line.find(self.__objectiveChar)
+            while col >= 0:
+                self.__objective.append((row, col))
+                col = line.find(self.__objectiveChar, col + 1)
+
+    # Loads a compiled maze file. The content hash is the one of the source
+    # text, so caches keyed by it are shared between both formats. The walls
+    # are unpacked a bit plane at a time, and the neighbor table is viewed in
+    # the mapped file rather than copied, which keeps the file mapped
+    def __loadCompiled(self, data):
+        (magic, flags, self.rows, self.cols, startRow, startCol, count,
+         sourceSize, sourceMtime, contentHash) = COMPILED_HEADER.unpack_from(data)
+        self.__contentHash = contentHash.hex()
+        size = self.rows * self.cols
+        position = COMPILED_HEADER.size
+        position += LENGTH.size + LENGTH.unpack_from(data, position)[0]    # the source path
+        if startRow >= 0:
+            self.__start = (startRow, startCol)
+        objectives = array('i')
+        objectives.frombytes(data[position:position + 8 * count])
+        self.__objective = [(objectives[i], objectives[i + 1]) for i in range(0, 2 * count, 2)]
+        position += 8 * count
+        packed = data[position:position + (size + 7) // 8]
+        walls = bytearray(8 * len(packed))
+        for k in range(8):
+            walls[k::8] = packed.translate(BIT_PLANES[k])
+        del walls[size:]
+        self.__walls = walls
+        position += len(packed)
+        if flags & COMPILED_NEIGHBORS:
+            self.__mapped = data
+            view = memoryview(data)
+            self.__adjOffsets = view[position:position + 4 * (size + 1)].cast('i')
+            position += 4 * (size + 1)
+            edges = self.__adjOffsets[size]
+            self.__adjTargets = view[position:position + 4 * edges].cast('i')
+            position += 4 * edges
+        if flags & COMPILED_DISTANCES:
+            length = LENGTH.unpack_from(data, position)[0]
+            self.__embeddedDistances = bytes(data[position + LENGTH.size:position + LENGTH.size + length])
+
+    # A maze viewing a mapped file is pickled with copies of its neighbor
+    # table, e.g. for process pools that do not fork
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        if self.__mapped is not None:
+            state['_Maze__mapped'] = None
+            state['_Maze__adjOffsets'] = array('i', self.__adjOffsets)
+            state['_Maze__adjTargets'] = array('i', self.__adjTargets)
+        return state
+
+    def __wallTable(self):
+        return bytes(1 if chr(i) == self.__wallChar else 0 for i in range(256))
+
+    # The maze as a list of rows of characters. The maze only stores the wall
+    # mask, so this is rebuilt from it and the start and objectives the file
+    # held, on first use
+    @property
+    def mazeRaw(self):
+        if self.__raw is None:
+            text = self.__walls.translate(bytes.maketrans(b'\x00\x01', (' ' + self.__wallChar).encode()))
+            cols = self.cols
+            self.__raw = [list(text[row * cols:(row + 1) * cols].decode()) for row in range(self.rows)]
+            start, objectives = self.__loaded
+            for row, col in objectives:
+                self.__raw[row][col] = self.__objectiveChar
+            if start is not None:
+                self.__raw[start[0]][start[1]] = self.__startChar
+        return self.__raw
+
+    # Builds the CSR neighbor table neighbor queries go through, on first use.
+    # The open neighbors of cell id i (row * cols + col) are
+    # adjTargets[adjOffsets[i]:adjOffsets[i + 1]]
+    def __buildNeighborTable(self):
+        rows, cols = self.rows, self.cols
+        walls = self.__walls
+        offsets = array('i', [0]) * (rows * cols + 1)
+        targets = array('i')
+        cell = 0
+        for row in range(rows):
+            for col in range(cols):
+                # down, up, right, left: the order getNeighbors has always returned
+                if row + 1 < rows and not walls[cell + cols]:
+                    targets.append(cell + cols)
+                if row > 0 and not walls[cell - cols]:
+                    targets.append(cell - cols)
+                if col + 1 < cols and not walls[cell + 1]:
+                    targets.append(cell + 1)
+                if col > 0 and not walls[cell - 1]:
+                    targets.append(cell - 1)
+                cell += 1
+                offsets[cell] = len(targets)
+        self.__adjOffsets = offsets
+        self.__adjTargets = targets
 
     # Returns True if the given position is the location of a wall
     def isWall(self, row, col):
-        return self.mazeRaw[row][col] == self.__wallChar
+        return self.__walls[row * self.cols + col] == 1
 
     # Rturns True if the given position is the location of an objective
     def isObjective(self, row, col):
-        return (row, col) in self.__objective
+        return (row, col) in self.__objectiveSet
 
     # Returns the start position as a tuple of (row, column)
     def getStart(self):
@@ -63,31 +281,112 @@ class Maze:
     def setStart(self, start):
         self.__start = start
 
+    # Returns the name of the file the maze was loaded from
+    def getFilename(self):
+        return self.__filename
+
+    # Returns the sha256 hex digest of the maze file content, used to key caches.
+    # After setWall it is the digest of that and of the cells that differ from
+    # the file, which takes no pass over the grid
+    def getContentHash(self):
+        if self.__wallDelta == 0:
+            return self.__contentHash
+        return hashlib.sha256(('%s:%x' % (self.__contentHash, self.__wallDelta)).encode()).hexdigest()
+
+    # Adds or removes the wall at the given position, raising IndexError if it
+    # is outside the maze. The neighbor table is rebuilt the next time it is
+    # used
+    def setWall(self, row, col, blocked):
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise IndexError("wall position (%d, %d) is outside the %dx%d maze" % (row, col, self.rows, self.cols))
+        if blocked == self.isWall(row, col):
+            return
+        if self.__raw is not None:
+            self.__raw[row][col] = self.__wallChar if blocked else ' '
+        self.__walls[row * self.cols + col] = 1 if blocked else 0
+        self.__wallDelta ^= editKey(row * self.cols + col)
+        self.__adjOffsets = None
+        self.__wallEdits.append(row * self.cols + col)
+        if len(self.__wallEdits) > WALL_EDIT_LOG:
+            forget = len(self.__wallEdits) // 2
+            del self.__wallEdits[:forget]
+            self.__wallEditBase += forget
+
+    # Returns the objective distance entry a compiled maze file carries (see
+    # distcache.decode), or None
+    def getEmbeddedDistances(self):
+        return self.__embeddedDistances
+
+    # Returns the number of setWall edits made so far
+    def getWallVersion(self):
+        return self.__wallEditBase + len(self.__wallEdits)
+
+    # Returns the cell ids setWall changed since the given getWallVersion, or
+    # None if those edits are no longer remembered
+    def getWallEdits(self, version):
+        if version < self.__wallEditBase:
+            return None
+        return self.__wallEdits[version - self.__wallEditBase:]
+
     # Returns the dimensions of the maze as a (row, column) tuple
     def getDimensions(self):
         return (self.rows, self.cols)
 
     # Returns the list of objective positions of the maze
     def getObjectives(self):
-        return copy.deepcopy(self.__objective)
+        return list(self.__objective)
 
     def setObjectives(self, objectives):
-        self.__objective = objectives
+        self.__objective = [tuple(objective) for objective in objectives]
+        self.__objectiveSet = set(self.__objective)
 
     # Check if the agent can move into a specific row and column
     def isValidMove(self, row, col):
-        return row >= 0 and row < self.rows and col >= 0 and col < self.cols and not self.isWall(row, col)
+        return 0 <= row < self.rows and 0 <= col < self.cols and not self.__walls[row * self.cols + col]
         
     # Returns list of neighboing squares that can be moved to from the given row,col
     def getNeighbors(self, row, col):
-        possibleNeighbors = [
-            (row + 1, col),
-            (row - 1, col),
-            (row, col + 1),
-            (row, col - 1)
-        ]
-        neighbors = []
-        for r, c in possibleNeighbors:
-            if self.isValidMove(r,c):
-                neighbors.append((r,c))
-        return neighbors
\ No newline at end of file
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            possibleNeighbors = [
+                (row + 1, col),
+                (row - 1, col),
+                (row, col + 1),
+                (row, col - 1)
+            ]
+            return [(r, c) for r, c in possibleNeighbors if self.isValidMove(r, c)]
+        if self.__adjOffsets is None:
+            self.__buildNeighborTable()
+        if self.__cells is None:
+            # a tuple per cell id so that positions are never re-allocated
+            self.__cells = [(r, c) for r in range(self.rows) for c in range(self.cols)]
+        cell = row * self.cols + col
+        cells = self.__cells
+        return [cells[n] for n in self.__adjTargets[self.__adjOffsets[cell]:self.__adjOffsets[cell + 1]]]
+
+    # Returns the integer cell id (row * cols + col) of the given position
+    def getCellId(self, row, col):
+        return row * self.cols + col
+
+    # Returns the (row, column) tuple of the given cell id
+    def getCellPos(self, cell):
+        if self.__cells is None:
+            return divmod(cell, self.cols)
+        return self.__cells[cell]
+
+    # Returns the cell ids of the open neighbors of the given cell id
+    def getNeighborIds(self, cell):
+        if self.__adjOffsets is None:
+            self.__buildNeighborTable()
+        return self.__adjTargets[self.__adjOffsets[cell]:self.__adjOffsets[cell + 1]]
+
+    # Returns the CSR neighbor table as (offsets, targets) arrays of cell ids.
+    # The tables are shared with the maze and must not be modified
+    def getNeighborTable(self):
+        if self.__adjOffsets is None:
+            self.__buildNeighborTable()
+        return self.__adjOffsets, self.__adjTargets
+
+    # Returns the flat wall mask, one byte per cell id (1 for walls, 0 otherwise).
+    # The mask is shared with the maze and must not be modified
+    def getWallMask(self):
+        return self.__walls
@@ -0,0 +1,228 @@
+# mazegen.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains a seeded generator of large mazes in the usual text format
+('%' walls, 'P' start, '.' objectives). Rows are written as they are made, so
+memory grows with the width and the number of dots, never with the area, and
+the same seed always writes the same file. KINDS:
+
+    perfect     a maze with exactly one path between any two cells (Eller's
+                algorithm, one row of cells at a time)
+    braided     a perfect maze with some extra openings, so that it has loops
+    rooms       open rooms in a grid, each wall between two rooms with a door
+    random      an open field with walls scattered at a density
+
+The start is always the top left cell, and the dots are spread uniformly
+over cells that are open. Every cell of perfect, braided and rooms mazes is
+reachable; random fields may wall off some cells and dots.
+
+    python mazegen.py big.txt --size 2000x2000 --kind braided --dots 20 --seed 7
+"""
+
+import argparse
+import random
+
+KINDS = ("perfect", "braided", "rooms", "random")
+
+# chance of an extra opening per wall of a braided maze
+LOOPS = 0.1
+
+# cells per side of a room
+ROOM_SIZE = 8
+
+# walls in a random field
+DENSITY = 0.25
+
+# bits a random field compares its density with, per cell
+DENSITY_BITS = 8
+
+# Writes a generated maze of rows x cols to filename. see KINDS
+def generate(filename, rows, cols, kind="perfect", dots=1, seed=0, loops=LOOPS, room=ROOM_SIZE, density=DENSITY):
+    if kind not in KINDS:
+        raise ValueError("unknown maze kind %r, one of %s" % (kind, ", ".join(KINDS)))
+    if rows < 3 or cols < 3:
+        raise ValueError("a maze needs at least 3x3 cells, not %dx%d" % (rows, cols))
+    rng = random.Random(seed)
+    if kind in ("perfect", "braided"):
+        lines = eller_lines(rows, cols, rng, loops if kind == "braided" else 0.0)
+        dotCells = sample_cells(rng, dots, lambda row, col: row % 2 == 1 and col % 2 == 1 and row < rows - 1 and col < cols - 1,
+                                (rows - 1) // 2 * ((cols - 1) // 2), rows, cols)
+    elif kind == "rooms":
+        lines = room_lines(rows, cols, rng, room)
+        inside = lambda n: sum(1 for i in range(1, n - 1) if i % (room + 1))
+        dotCells = sample_cells(rng, dots, lambda row, col: row % (room + 1) != 0 and col % (room + 1) != 0,
+                                inside(rows) * inside(cols), rows, cols)
+    else:
+        lines = random_lines(rows, cols, rng, density)
+        dotCells = sample_cells(rng, dots, lambda row, col: True, (rows - 2) * (cols - 2), rows, cols)
+    with open(filename, "w") as f:
+        for row, line in enumerate(lines):
+            marks = dotCells.get(row)
+            if marks or row == 1:
+                line = list(line)
+                for col in marks or ():
+                    line[col] = '.'
+                if row == 1:
+                    line[1] = 'P'
+                line = ''.join(line)
+            f.write(line + '\n')
+
+# Picks count distinct cells for which good(row, col) holds, away from the
+# border and the start, out of about available such cells. returns {row:
+# [col, ...]}
+def sample_cells(rng, count, good, available, rows, cols):
+    if count > available - 1:
+        raise ValueError("%d dots do not fit into %d open cells" % (count, available - 1))
+    chosen = set()
+    while len(chosen) < count:
+        row, col = rng.randrange(1, rows - 1), rng.randrange(1, cols - 1)
+        if good(row, col) and (row, col) != (1, 1):
+            chosen.add((row, col))
+    cells = {}
+    for row, col in sorted(chosen):
+        cells.setdefault(row, []).append(col)
+    return cells
+
+# Yields the text rows of a maze made by Eller's algorithm over the cells at
+# odd rows and columns. with loops > 0, that share of the walls a perfect maze
+# keeps is opened too
+def eller_lines(rows, cols, rng, loops):
+    cellRows, cellCols = (rows - 1) // 2, (cols - 1) // 2
+    # walls left past the last cell when rows or cols are even
+    padding = '%' * (cols - 1 - 2 * cellCols)
+    yield '%' * cols
+    labels = list(range(cellCols))
+    for cellRow in range(cellRows):
+        last = cellRow == cellRows - 1
+        # join neighbors in different sets at random (all of them in the last
+        # row), tracking the sets with a union-find over this row's labels
+        union = list(range(cellCols))
+        def find(label):
+            while union[label] != label:
+                union[label] = union[union[label]]
+                label = union[label]
+            return label
+        line = ['%']
+        for col in range(cellCols - 1):
+            left, right = find(labels[col]), find(labels[col + 1])
+            if left != right and (last or rng.random() < 0.5):
+                union[right] = left
+                line.append('  ')
+            elif left == right and rng.random() < loops:
+                line.append('  ')
+            else:
+                line.append(' %')
+        line.append(' %')
+        yield ''.join(line) + padding
+        if last:
+            break
+
+        # every set goes down at least once
+        members = {}
+        for col in range(cellCols):
+            labels[col] = find(labels[col])
+            members.setdefault(labels[col], []).append(col)
+        down = [False] * cellCols
+        for cells in members.values():
+            for col in cells:
+                down[col] = rng.random() < 0.5
+            if not any(down[col] for col in cells):
+                down[rng.choice(cells)] = True
+        # the cells that did not go down start sets of their own, under the
+        # labels no cell below uses
+        used = set(labels[col] for col in range(cellCols) if down[col])
+        fresh = [label for label in range(cellCols) if label not in used]
+        line = ['%']
+        for col in range(cellCols):
+            if down[col]:
+                line.append(' %')
+            else:
+                line.append('%%')
+                labels[col] = fresh.pop()
+        yield ''.join(line) + padding
+    for row in range(2 * cellRows, rows):
+        yield '%' * cols
+
+# Yields the text rows of a grid of open rooms of room x room cells, with one
+# door in every wall between two rooms
+def room_lines(rows, cols, rng, room):
+    span = room + 1
+    walls = range(span, cols - 1, span)     # columns of the walls between rooms
+    interior = ''.join('%' if col == 0 or col == cols - 1 or (col % span == 0 and col < cols - 1) else ' '
+                       for col in range(cols))
+    doors = {}
+    for row in range(rows):
+        if row == 0 or row == rows - 1:
+            yield '%' * cols
+        elif row % span == 0:
+            # a door into every room of the band below
+            line = list('%' * cols)
+            for left in range(1, cols - 1, span):
+                line[rng.randrange(left, min(left + room, cols - 1))] = ' '
+            yield ''.join(line)
+        else:
+            if row % span == 1:
+                # the row of the door in every wall of this band
+                bottom = min(row + room, rows - 1)
+                doors = {}
+                for col in walls:
+                    doors.setdefault(rng.randrange(row, bottom), []).append(col)
+            if row not in doors:
+                yield interior
+                continue
+            line = list(interior)
+            for col in doors[row]:
+                line[col] = ' '
+            yield ''.join(line)
+
+# Yields the text rows of an open field with walls at density, drawn a row at
+# a time: a cell is a wall if DENSITY_BITS random bits, read as a number below
+# 2 ** DENSITY_BITS, are below density scaled alike
+def random_lines(rows, cols, rng, density):
+    threshold = int(round(density * (1 << DENSITY_BITS)))
+    width = cols - 2
+    mask = (1 << width) - 1
+    digits = str.maketrans('01', ' %')
+    yield '%' * cols
+    for row in range(1, rows - 1):
+        # compare the bits of every cell with those of threshold at once,
+        # from the highest: below is the cells found smaller, equal those
+        # with all bits so far the same
+        below, equal = 0, mask
+        for bit in reversed(range(DENSITY_BITS)):
+            drawn = rng.getrandbits(width)
+            if threshold >> bit & 1:
+                below |= equal & ~drawn
+                equal &= drawn
+            else:
+                equal &= ~drawn & mask
+        yield '%' + format(below & mask, '0%db' % width).translate(digits) + '%'
+    yield '%' * cols
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='CS440 MP1 maze generator')
+    parser.add_argument('filename', type=str,
+                        help='maze file to write')
+    parser.add_argument('--size', dest="size", type=str, default = "100x100",
+                        help='rows x columns - default 100x100')
+    parser.add_argument('--kind', dest="kind", type=str, default = "perfect", choices = KINDS,
+                        help='layout of the maze - default perfect')
+    parser.add_argument('--dots', dest="dots", type=int, default = 1,
+                        help='number of objectives - default 1')
+    parser.add_argument('--seed', dest="seed", type=int, default = 0,
+                        help='random seed - default 0')
+    parser.add_argument('--loops', dest="loops", type=float, default = LOOPS,
+                        help='share of extra openings of a braided maze - default %g' % LOOPS)
+    parser.add_argument('--room', dest="room", type=int, default = ROOM_SIZE,
+                        help='cells per side of a room - default %d' % ROOM_SIZE)
+    parser.add_argument('--density', dest="density", type=float, default = DENSITY,
+                        help='share of walls in a random field - default %g' % DENSITY)
+
+    args = parser.parse_args()
+    rows, cols = (int(n) for n in args.size.lower().split("x"))
+    generate(args.filename, rows, cols, args.kind, args.dots, args.seed, args.loops, args.room, args.density)
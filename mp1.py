@@ -14,22 +14,39 @@ initializes the pygame context, and handles the interface between the
 game and the search algorithm.
 """
 
-import pygame
 import sys
 import argparse
+import json
 import time
 
-from pygame.locals import *
-from agent import Agent
-from maze import Maze
-from search import search
+from compiled import load_maze
+from search import search_steps, methods, options_for
+from frontier import FRONTIERS, TIES
+from steps import EXPANDED, IMPROVED, drain
+from instrument import SearchStats, profile_steps
+import distcache
+
+# pygame is imported on first use so that headless runs never load it
+pygame = None
+
+def loadPygame():
+    global pygame
+    if pygame is None:
+        import pygame as module
+        pygame = module
+    return pygame
 
 class Application:
-    def __init__(self, human=True, scale=20, fps=30):
+    def __init__(self, human=True, scale=20, fps=30, animate=0, stats=None, options=None):
         self.running = True
         self.displaySurface = None
+        self.mazePixels = None
         self.scale = scale
         self.fps = fps
+        self.animate = animate
+        self.statsFormat = stats
+        self.searchOptions = options or {}
+        self.bound = None
         self.windowTitle = "CS440 MP1: "
         self.__human = human
     
@@ -37,7 +54,7 @@ class Application:
     def initialize(self, filename):
         self.windowTitle += filename
 
-        self.maze = Maze(filename)
+        self.maze = load_maze(filename)
         self.gridDim = self.maze.getDimensions()
         
         self.windowHeight = self.gridDim[0] * self.scale
@@ -47,6 +64,7 @@ class Application:
         self.blockSizeY = int(self.windowHeight / self.gridDim[0])
 
         if self.__human:
+            from agent import Agent
             self.agentRadius = min(self.blockSizeX, self.blockSizeY) / 4
             self.agent = Agent(self.maze.getStart(), self.maze, self.blockSizeX, self.blockSizeY)
 
@@ -58,33 +76,55 @@ class Application:
             print("No maze created")
             raise SystemExit
             
-        if not self.__human:            
-            path, statesExplored = search(self.maze, searchMethod)            
-        else:
+        # the search is only animated when there is a window to watch it in
+        animate = self.animate and not self.__human and save is None
+        stats = None
+        if self.__human:
             path, statesExplored = [], 0
+        else:
+            options = options_for(searchMethod, self.searchOptions)
+            if self.statsFormat is not None:
+                stats = SearchStats(searchMethod)
+                steps = profile_steps(self.maze, searchMethod, stats, **options)
+            else:
+                steps = search_steps(self.maze, searchMethod, **options)
+            steps = self.watchBound(steps)
+            if not animate:
+                path, statesExplored = drain(steps)
+
+        loadPygame()
+        if save is not None:
+            # nothing is shown when saving, so draw offscreen without a window
+            self.displaySurface = pygame.Surface((self.windowWidth, self.windowHeight))
+        else:
+            pygame.init()
+            self.displaySurface = pygame.display.set_mode((self.windowWidth, self.windowHeight), pygame.HWSURFACE)
+            pygame.display.set_caption(self.windowTitle)
 
-        pygame.init()
-        self.displaySurface = pygame.display.set_mode((self.windowWidth, self.windowHeight), pygame.HWSURFACE)
-        self.displaySurface.fill((255, 255, 255))
-        pygame.display.flip()
-        pygame.display.set_caption(self.windowTitle)
+        if animate:
+            path, statesExplored = self.animateSearch(steps)
 
-        if self.__human:
-            self.drawPlayer()
-        else:
+        if not self.__human:
             print("Results")
             print("Path Length:", len(path))
             print("States Explored:", statesExplored)
-            self.drawPath(path)
-            
-        self.drawMaze()
+            if self.bound is not None:
+                print("Suboptimality Bound: %.3f" % self.bound)
+            if self.statsFormat == "json":
+                print(json.dumps(stats.toDict()))
+            elif self.statsFormat == "text":
+                print(stats.report())
+
+        self.drawMaze(path)
+        if self.__human:
+            self.drawPlayer()
         self.drawStart()
         self.drawObjective()
 
-        pygame.display.flip()
         if save is not None:
             pygame.image.save(self.displaySurface, save)
-            self.running = False
+            return
+        pygame.display.flip()
         
         clock = pygame.time.Clock()
 
@@ -93,7 +133,7 @@ class Application:
             keys = pygame.key.get_pressed()            
             clock.tick(self.fps)
 
-            if (keys[K_ESCAPE]):
+            if (keys[pygame.K_ESCAPE]):
                     raise SystemExit
 
             for event in pygame.event.get():
@@ -101,27 +141,86 @@ class Application:
                     raise SystemExit
 
             if self.__human:
-                if (keys[K_RIGHT]):
+                if (keys[pygame.K_RIGHT]):
                     self.agent.moveRight()
 
-                if (keys[K_LEFT]):
+                if (keys[pygame.K_LEFT]):
                     self.agent.moveLeft()
 
-                if (keys[K_UP]):
+                if (keys[pygame.K_UP]):
                     self.agent.moveUp()
 
-                if (keys[K_DOWN]):
+                if (keys[pygame.K_DOWN]):
                     self.agent.moveDown()                        
 
                 self.gameLoop()                
 
 
-    # The game loop is where everything is drawn to the context. Only called when a human is playing
-    def gameLoop(self):
+    # Passes the events of steps through, keeping the last suboptimality bound
+    # an anytime search reported in self.bound
+    def watchBound(self, steps):
+        while True:
+            try:
+                event = next(steps)
+            except StopIteration as done:
+                return done.value
+            if event[0] == IMPROVED:
+                self.bound = event[1]
+            yield event
+
+    # Runs the step-wise search steps one event at a time, drawing each
+    # expanded cell and the cells it pushed onto the frontier, self.animate
+    # expansions per frame at self.fps. returns the search result once it finishes
+    def animateSearch(self, steps):
+        self.drawMaze()
+        self.drawStart()
         self.drawObjective()
-        self.drawPlayer()
-        self.agent.update()
         pygame.display.flip()
+        clock = pygame.time.Clock()
+        dirty = []
+        expanded = 0
+        while True:
+            try:
+                event = next(steps)
+            except StopIteration as done:
+                pygame.display.update(dirty)
+                return done.value
+            if event[0] != EXPANDED:
+                continue
+            row, col = divmod(event[1], self.gridDim[1])
+            for pushed in event[2]:
+                pushedRow, pushedCol = divmod(pushed, self.gridDim[1])
+                self.drawSquare(pushedRow, pushedCol, (255, 255, 160))
+                dirty.append(pygame.Rect(pushedCol * self.blockSizeX, pushedRow * self.blockSizeY, self.blockSizeX, self.blockSizeY))
+            self.drawSquare(row, col, (160, 200, 255))
+            dirty.append(pygame.Rect(col * self.blockSizeX, row * self.blockSizeY, self.blockSizeX, self.blockSizeY))
+            expanded += 1
+            if expanded % self.animate == 0:
+                pygame.display.update(dirty)
+                dirty = []
+                clock.tick(self.fps)
+                for windowEvent in pygame.event.get():
+                    if windowEvent.type == pygame.QUIT:
+                        raise SystemExit
+
+    # The game loop is where everything is drawn to the context. Only called when a human is playing.
+    # Only the cells the agent left and entered change, so only those are redrawn and updated. The
+    # agent may move more than once a frame, and the objectives among the cells it left are drawn
+    # again over its trail
+    def gameLoop(self):
+        left = self.agent.update()
+        if not left:
+            return
+        current = (self.agent.row, self.agent.col)
+        for row, col in left:
+            self.drawCircle(row, col, (0, 0, 255))
+        self.drawPlayer()
+        for row, col in left:
+            if (row, col) != current and self.maze.isObjective(row, col):
+                self.drawCircle(row, col, (0, 0, 0))
+        dirty = left + [current]
+        pygame.display.update([pygame.Rect(col * self.blockSizeX, row * self.blockSizeY, self.blockSizeX, self.blockSizeY)
+                               for row, col in dirty])
 
     # Implementation of a color scheme for the path taken
     # If Red-Green does not work for you while debugging (for e.g. color blindness),
@@ -146,11 +245,17 @@ class Application:
 
         return (red, green, blue)
 
-    # Draws the path (given as a list of (row, col) tuples) to the display context
+    # getColor for every index of a path at once. The scheme is linear in the
+    # index, so it is evaluated twice and extrapolated
+    def getColors(self, pathLength):
+        first = self.getColor(pathLength, 0)
+        step = [b - a for a, b in zip(first, self.getColor(pathLength, 1))]
+        return [tuple(min(255, max(0, int(first[c] + index * step[c]))) for c in range(3))
+                for index in range(pathLength)]
+
+    # Draws the path (given as a list of (row, col) tuples) to the display context, along with the maze
     def drawPath(self, path):
-        for p in range(len(path)):
-            color = self.getColor(len(path), p)
-            self.drawSquare(path[p][0], path[p][1], color)
+        self.drawMaze(path)
 
     # Simple wrapper for drawing a wall as a rectangle
     def drawWall(self, row, col):
@@ -182,32 +287,85 @@ class Application:
         row,col = self.maze.getStart()
         pygame.draw.rect(self.displaySurface, (0,0,255), (col * self.blockSizeX + self.blockSizeX/4, row * self.blockSizeY + self.blockSizeY/4, self.blockSizeX * 0.5, self.blockSizeY * 0.5), 0)
 
-    # Draws the full maze to the display context
-    def drawMaze(self):
-        for row in range(self.gridDim[0]):
-            for col in range(self.gridDim[1]):
-                if self.maze.isWall(row, col):
-                    self.drawWall(row, col)
+    # Draws the full maze, and the path if given, to the display context. The
+    # maze is rendered once at one pixel per cell (walls black, open cells
+    # white), the path gradient is written into a copy of those pixels and
+    # the image is scaled up to the window in one blit
+    def drawMaze(self, path=()):
+        rows, cols = self.gridDim
+        if self.mazePixels is None:
+            shade = self.maze.getWallMask().translate(bytes.maketrans(b'\x00\x01', b'\xff\x00'))
+            self.mazePixels = bytearray(rows * cols * 3)
+            for channel in range(3):
+                self.mazePixels[channel::3] = shade
+        pixels = self.mazePixels
+        if path:
+            pixels = bytearray(pixels)
+            for (row, col), color in zip(path, self.getColors(len(path))):
+                offset = (row * cols + col) * 3
+                pixels[offset:offset + 3] = bytes(color)
+        image = pygame.image.frombuffer(bytes(pixels), (cols, rows), 'RGB')
+        self.displaySurface.blit(pygame.transform.scale(image, (cols * self.blockSizeX, rows * self.blockSizeY)), (0, 0))
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description='CS440 MP1 Search')
     
-    parser.add_argument('filename',
-                        help='path to maze file [REQUIRED]')
-    parser.add_argument('--method', dest="search", type=str, default = "bfs", 
-                        choices = ["bfs", "dfs", "greedy", "astar"],
-                        help='search method - default bfs')
+    parser.add_argument('filename', nargs='+',
+                        help='path to maze file [REQUIRED]; with --headless, any number of files or globs')
+    parser.add_argument('--method', dest="search", type=str, default = ["bfs"], nargs='+',
+                        choices = list(methods), metavar = "METHOD",
+                        help='search method, one of {%s} - default bfs; with --headless, any number of methods' % ",".join(methods))
+    parser.add_argument('--frontier', dest="frontier", type=str, default = None, choices = list(FRONTIERS),
+                        help='priority queue of astar and greedy - default heap')
+    parser.add_argument('--tie', dest="tie", type=str, default = None, choices = list(TIES),
+                        help='tie-breaking between equal priorities in astar and greedy - default position')
+    parser.add_argument('--deadline-ms', dest="deadline_ms", type=float, default = None,
+                        help='time budget of ara, which returns the best path found by then - default none')
+    parser.add_argument('--max-expansions', dest="max_expansions", type=int, default = None,
+                        help='expansion budget of ara - default none')
     parser.add_argument('--scale', dest="scale", type=int, default = 20,
                         help='scale - default: 20')
     parser.add_argument('--fps', dest="fps", type=int, default = 30,
                         help='fps for the display - default 30')
+    parser.add_argument('--animate', dest="animate", type=int, nargs='?', const = 1, default = 0, metavar = "N",
+                        help='draw the search as it runs, this many expansions per frame - default not animated')
+    parser.add_argument('--stats', dest="stats", type=str, nargs='?', const = "text", default = None,
+                        choices = ["text", "json"],
+                        help='also print search statistics (pops, pushes, peak sizes, call counts, leg timings) as text or one JSON line; with --headless, in every record - default not printed')
     parser.add_argument('--human', default = False, action = "store_true",
                         help='flag for human playable - default False')
     parser.add_argument('--save', dest="save", type=str, default = None, 
                         help='save output to image file - default not saved')
-    
+    parser.add_argument('--cache-dir', dest="cache_dir", type=str, default = None,
+                        help='directory for cached objective distances - default $MAZE_CACHE_DIR, or no cache')
+
+    parser.add_argument('--headless', default = False, action = "store_true",
+                        help='run without a display and print one JSON line per (maze, method) - default False')
+    parser.add_argument('--workers', dest="workers", type=int, default = None,
+                        help='processes used by --headless - default one per CPU')
+    parser.add_argument('--output', dest="output", type=str, default = None,
+                        help='file the --headless JSON lines are written to - default stdout')
 
     args = parser.parse_args()
-    app = Application(args.human, args.scale, args.fps)
-    app.execute(args.filename, args.search, args.save)
+    options = {name: value for name, value in (("frontier", args.frontier), ("tie", args.tie),
+                                               ("deadline_ms", args.deadline_ms), ("max_expansions", args.max_expansions))
+               if value is not None}
+    if args.cache_dir is not None:
+        distcache.configure(args.cache_dir)
+
+    if args.headless:
+        import headless
+        # every record is a JSON line, so --stats text is taken as json
+        stats = args.stats is not None
+        if args.output is None:
+            failures = headless.run(args.filename, args.search, args.workers, options=options, stats=stats)
+        else:
+            with open(args.output, "w") as output:
+                failures = headless.run(args.filename, args.search, args.workers, output, options, stats)
+        sys.exit(1 if failures else 0)
+
+    if len(args.filename) != 1 or len(args.search) != 1:
+        parser.error("several mazes or methods need --headless")
+    app = Application(args.human, args.scale, args.fps, args.animate, args.stats, options)
+    app.execute(args.filename[0], args.search[0], args.save)
@@ -0,0 +1,386 @@
+# multidot.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the optimal multi-objective engine behind the multi
+objective branch of astar in search.py. It computes exact maze distances
+between the start and every objective once, then runs A* over (current
+objective, visited objectives bitmask) states with a minimum spanning tree
+heuristic. bfs, dfs and greedy keep searching one leg at a time from the
+objective the last leg reached, so their legs depend on each other and are
+not run here.
+
+The searches from the start and every objective are independent, so on large
+mazes with many objectives they are spread over a process pool. The neighbor
+table is put into shared memory once for all of them, and the workers write
+their rows of the distance matrix into a shared block and send the legs back
+as flat arrays of cell ids.
+"""
+
+from array import array
+import heapq
+import multiprocessing
+from multiprocessing import shared_memory
+import os
+import distcache
+from steps import add_counts
+
+# Bounds on the exact tour search. Past these the engine falls back to a
+# nearest objective tour, since the number of (node, bitmask) states grows as
+# k * 2^k
+MAX_TOUR_OBJECTIVES = 24
+MAX_TOUR_EXPANSIONS = 100000
+
+# objective_distances searches in parallel from this many cells and this many
+# objectives up; below, starting the workers costs more than they save
+PARALLEL_CELLS = 40000
+PARALLEL_OBJECTIVES = 8
+
+# breadth first search over cell ids from source, stopping once every cell in
+# wanted has been reached, or with first once the layer reaching any of them is
+# done. returns dist and parent arrays and the number of cells expanded. the
+# work done is added to counts if given, see steps.add_counts
+def bfs_distances(maze, source, wanted=(), counts=None, first=False):
+    offsets, targets = maze.getNeighborTable()
+    return bfs_table(offsets, targets, maze.rows * maze.cols, source, wanted, counts, first)
+
+# bfs_distances over a neighbor table of size cells, which may be held in
+# arrays or in memoryviews of shared memory
+def bfs_table(offsets, targets, size, source, wanted=(), counts=None, first=False):
+    dist = array('i', [-1]) * size
+    parent = array('i', [-1]) * size
+    dist[source] = 0
+    remaining = set(wanted)
+    remaining.discard(source)
+    # how many of wanted may be left unreached when the search stops
+    left = max(len(remaining) - 1, 0) if first else 0
+    frontier = [source]
+    depth = 0
+    expanded = 0
+    pushes = 0
+    peak = 1
+    while frontier and (len(remaining) > left or not wanted):
+        depth += 1
+        next_frontier = []
+        for cell in frontier:
+            expanded += 1
+            for neighbor in targets[offsets[cell]:offsets[cell + 1]]:
+                if dist[neighbor] < 0:
+                    dist[neighbor] = depth
+                    parent[neighbor] = cell
+                    next_frontier.append(neighbor)
+                    remaining.discard(neighbor)
+        frontier = next_frontier
+        pushes += len(frontier)
+        peak = max(peak, len(frontier))
+    if counts is not None:
+        add_counts(counts, {"pops": expanded, "pushes": pushes, "neighbor_calls": expanded,
+                            "peak_frontier": peak, "peak_visited": pushes + 1})
+    return dist, parent, expanded
+
+# walks parent pointers back from target to source, returning the cell ids of
+# the leg from source (exclusive) to target (inclusive)
+def leg_from_parents(parent, source, target):
+    leg = array('i')
+    current = target
+    while current != source:
+        leg.append(current)
+        current = parent[current]
+    leg.reverse()
+    return leg
+
+# fills in the distances and legs from every cell to the cells before it from
+# those the other way, which the searches found. the leg back is the same path
+# reversed
+def mirror(dist, legs, cells):
+    for i in range(len(cells)):
+        dist[i][i] = 0
+        legs[i][i] = array('i')
+        for j in range(i):
+            dist[i][j] = dist[j][i]
+            if legs[j][i] is not None:
+                back = array('i', reversed(legs[j][i][:-1]))
+                back.append(cells[j])
+                legs[i][j] = back
+
+# computes the exact distance matrix between the given cell ids and the leg
+# between every ordered pair. dist[i][j] is -1 when j is unreachable from i.
+# as distances are symmetric, the search from each cell only runs until it
+# reached the cells after it, see mirror. the searches run on a pool of
+# workers (os.cpu_count() by default) when the maze and the number of cells
+# are large enough, see PARALLEL_CELLS. returns dist, legs and the number of
+# cells expanded, and adds the work to counts
+def objective_distances(maze, cells, workers=None, counts=None):
+    count = len(cells)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, count)
+    # pool workers are daemonic and cannot start pools of their own
+    if (workers > 1 and count >= PARALLEL_OBJECTIVES and maze.rows * maze.cols >= PARALLEL_CELLS
+            and multiprocessing.parent_process() is None):
+        return parallel_objective_distances(maze, cells, workers, counts)
+    dist = [[-1] * count for i in range(count)]
+    legs = [[None] * count for i in range(count)]
+    expanded = 0
+    for i in range(count - 1):
+        field, parent, cost = bfs_distances(maze, cells[i], cells[i + 1:], counts)
+        expanded += cost
+        for j in range(i + 1, count):
+            if field[cells[j]] >= 0:
+                dist[i][j] = field[cells[j]]
+                legs[i][j] = leg_from_parents(parent, cells[i], cells[j])
+    mirror(dist, legs, cells)
+    return dist, legs, expanded
+
+# the shared neighbor table and distance matrix a worker searches and fills
+_shared = None
+
+def _attach_shared(names, size, edges, cells):
+    global _shared
+    blocks = [shared_memory.SharedMemory(name) for name in names]
+    offsets = blocks[0].buf.cast('i')[:size + 1]
+    targets = blocks[1].buf.cast('i')[:edges]
+    matrix = blocks[2].buf.cast('i')[:len(cells) * len(cells)]
+    # the blocks are kept too, since closing them would unmap the views
+    _shared = (blocks, offsets, targets, size, matrix, cells)
+
+# the worker side of one search: fills row i of the shared distance matrix
+# from the diagonal on and returns i, the cells expanded, the legs from
+# cells[i] to cells[i + 1:] as one array of cell ids with the length of each
+# leg, -1 for unreachable ones, and the counts of the search
+def _search_from(i):
+    blocks, offsets, targets, size, matrix, cells = _shared
+    count = len(cells)
+    counts = {}
+    field, parent, expanded = bfs_table(offsets, targets, size, cells[i], cells[i + 1:], counts)
+    lengths = array('i')
+    steps = array('i')
+    for j in range(i + 1, count):
+        cell = cells[j]
+        matrix[i * count + j] = field[cell]
+        if field[cell] < 0:
+            lengths.append(-1)
+            continue
+        leg = leg_from_parents(parent, cells[i], cell)
+        lengths.append(len(leg))
+        steps.extend(leg)
+    return i, expanded, lengths, steps, counts
+
+# objective_distances on a pool of workers, one search per cell
+def parallel_objective_distances(maze, cells, workers, counts=None):
+    offsets, targets = maze.getNeighborTable()
+    size = maze.rows * maze.cols
+    count = len(cells)
+    blocks = []
+    try:
+        for data in (offsets, targets, array('i', [-1]) * (count * count)):
+            block = shared_memory.SharedMemory(create=True, size=max(data.itemsize, len(data) * data.itemsize))
+            blocks.append(block)
+            block.buf[:len(data) * data.itemsize] = memoryview(data).cast('B')
+        legs = [[None] * count for i in range(count)]
+        expanded = 0
+        with multiprocessing.Pool(workers, initializer=_attach_shared,
+                                  initargs=([block.name for block in blocks], size, len(targets), cells)) as pool:
+            for i, cost, lengths, steps, searched in pool.imap_unordered(_search_from, range(count - 1)):
+                expanded += cost
+                if counts is not None:
+                    add_counts(counts, searched)
+                position = 0
+                for j, length in enumerate(lengths, i + 1):
+                    if length >= 0:
+                        legs[i][j] = steps[position:position + length]
+                        position += length
+        matrix = array('i')
+        matrix.frombytes(bytes(blocks[2].buf[:count * count * matrix.itemsize]))
+        dist = [list(matrix[i * count:(i + 1) * count]) for i in range(count)]
+        mirror(dist, legs, cells)
+        return dist, legs, expanded
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+# the cell ids multi_astar measures distances between: the start, then every
+# objective once
+def objective_cells(maze):
+    start = maze.getStart()
+    cells = [maze.getCellId(start[0], start[1])]
+    for objective in maze.getObjectives():
+        cell = maze.getCellId(objective[0], objective[1])
+        if cell not in cells:
+            cells.append(cell)
+    return cells
+
+# objective_distances backed by the distances a compiled maze file carries and
+# the on-disk cache when one is configured. a hit costs no expansions
+def cached_objective_distances(maze, cells, counts=None):
+    embedded = maze.getEmbeddedDistances()
+    if embedded is not None:
+        entry = distcache.decode(embedded, maze, cells)
+        if entry is not None:
+            return entry[0], entry[1], 0
+    cache = distcache.default_cache
+    if cache is not None:
+        entry = cache.load(maze, cells)
+        if entry is not None:
+            return entry[0], entry[1], 0
+    dist, legs, expanded = objective_distances(maze, cells, counts=counts)
+    if cache is not None:
+        cache.store(maze, cells, dist, legs)
+    return dist, legs, expanded
+
+# length of the minimum spanning tree over the given node indices (Prim)
+def mst_length(nodes, dist):
+    if len(nodes) < 2:
+        return 0
+    # best[i] is the cheapest edge from the tree to rest[i]
+    rest = nodes[1:]
+    best = [dist[nodes[0]][node] for node in rest]
+    total = 0
+    while rest:
+        cheapest = min(best)
+        i = best.index(cheapest)
+        total += cheapest
+        node = rest[i]
+        rest[i], best[i] = rest[-1], best[-1]
+        rest.pop()
+        best.pop()
+        row = dist[node]
+        for i in range(len(rest)):
+            if row[rest[i]] < best[i]:
+                best[i] = row[rest[i]]
+    return total
+
+# visits objectives by always moving to the nearest unvisited one, found by a
+# breadth first search from the start and then from every objective reached
+# that stops at the nearest one left, so no distances between other pairs are
+# computed. ties go to the objective listed first. returns the legs in
+# visiting order, or None if an objective cannot be reached, and the number
+# of cells expanded
+def nearest_legs(maze, cells, counts=None):
+    remaining = list(cells[1:])
+    current = cells[0]
+    legs = []
+    expanded = 0
+    while remaining:
+        field, parent, cost = bfs_distances(maze, current, remaining, counts, first=True)
+        expanded += cost
+        reached = [cell for cell in remaining if field[cell] >= 0]
+        # the objectives left are walled off from every one reached
+        if not reached:
+            return None, expanded
+        nearest = min(reached, key=lambda cell: field[cell])
+        legs.append(leg_from_parents(parent, current, nearest))
+        remaining.remove(nearest)
+        current = nearest
+    return legs, expanded
+
+# A* over (current node, visited bitmask) states. node 0 is the start and
+# nodes 1..k are objectives. the heuristic is the MST over the unvisited
+# objectives plus the cheapest edge from the current node into them, with the
+# MST memoized per remaining set. returns (order, expansions) where order is
+# the list of objective indices in visiting order, or (None, expansions) when
+# max_expansions is exceeded
+def optimal_tour(dist, max_expansions=None, counts=None):
+    k = len(dist) - 1
+    full = (1 << k) - 1
+    mst_cache = {}
+
+    def heuristic(current, visited):
+        remaining = full & ~visited
+        if not remaining:
+            return 0
+        entry = mst_cache.get(remaining)
+        if entry is None:
+            nodes = [j + 1 for j in range(k) if remaining >> j & 1]
+            entry = mst_cache[remaining] = (mst_length(nodes, dist), nodes)
+        mst, nodes = entry
+        row = dist[current]
+        return mst + min(row[j] for j in nodes)
+
+    stride = k + 1
+    start_key = 0
+    g_cost = {start_key: 0}
+    parent = {start_key: None}
+    frontier = [(heuristic(0, 0), 0, 0, 0)]
+    expansions = 0
+    pushes = 0
+    peak = 1
+
+    # adds the work of the search to counts
+    def report():
+        if counts is not None:
+            add_counts(counts, {"pops": expansions, "pushes": pushes, "heuristic_calls": pushes + 1,
+                                "peak_frontier": peak, "peak_visited": len(g_cost)})
+
+    while frontier:
+        f, neg_g, current, visited = heapq.heappop(frontier)
+        key = visited * stride + current
+        if -neg_g > g_cost[key]:
+            continue
+        if visited == full:
+            order = []
+            while key != start_key:
+                order.append(key % stride)
+                key = parent[key]
+            report()
+            return order[::-1], expansions
+        expansions += 1
+        if max_expansions is not None and expansions > max_expansions:
+            report()
+            return None, expansions
+        g = -neg_g
+        row = dist[current]
+        for j in range(k):
+            if visited >> j & 1:
+                continue
+            node = j + 1
+            next_visited = visited | (1 << j)
+            next_key = next_visited * stride + node
+            next_g = g + row[node]
+            if next_g < g_cost.get(next_key, next_g + 1):
+                g_cost[next_key] = next_g
+                parent[next_key] = key
+                heapq.heappush(frontier, (next_g + heuristic(node, next_visited), -next_g, node, next_visited))
+                pushes += 1
+        peak = max(peak, len(frontier))
+    report()
+    return None, expansions
+
+# shortest path from the start through every objective, [] if one of them
+# cannot be reached, as for the other searches. the work done is added to
+# counts if given, see steps.add_counts
+# return path, num_states_explored
+# num_states_explored counts the cells the distance searches expanded (none
+# when the distances were cached) plus the tour states expanded. past
+# MAX_TOUR_OBJECTIVES, or when the tour search gives up, the path is a nearest
+# objective tour and only the cells its searches expanded are counted, not
+# the distances between pairs the tour search was given up on
+def multi_astar(maze, max_expansions=MAX_TOUR_EXPANSIONS, counts=None):
+    start = maze.getStart()
+    cells = objective_cells(maze)
+    order = None
+    if len(cells) - 1 <= MAX_TOUR_OBJECTIVES:
+        dist, legs, num_states_explored = cached_objective_distances(maze, cells, counts)
+        if min(dist[0]) < 0:
+            return [], num_states_explored
+        order, expansions = optimal_tour(dist, max_expansions, counts)
+        num_states_explored += expansions
+
+    path = [start]
+    if order is None:
+        tour, num_states_explored = nearest_legs(maze, cells, counts)
+        if tour is None:
+            return [], num_states_explored
+        for leg in tour:
+            path.extend(maze.getCellPos(cell) for cell in leg)
+        return path, num_states_explored
+    current = 0
+    for node in order:
+        path.extend(maze.getCellPos(cell) for cell in legs[current][node])
+        current = node
+    return path, num_states_explored
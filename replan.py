@@ -0,0 +1,162 @@
+# replan.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains IncrementalPlanner, a D* Lite planner that keeps its search
+state between queries. It searches backward from the objectives towards the
+start, so moving the start, adding or removing walls and changing objectives
+only repair the g-values the change affects instead of searching again from
+nothing. Typical use is live guidance that replans after every step:
+
+    planner = IncrementalPlanner(maze)
+    path, explored = planner.plan()
+    planner.move_start(path[1])
+    planner.set_wall(3, 4, True)
+    path, explored = planner.plan()
+"""
+
+import heapq
+
+INF = float("inf")
+
+class IncrementalPlanner:
+    def __init__(self, maze, start=None, objectives=None):
+        self.maze = maze
+        self.rows = maze.rows
+        self.cols = maze.cols
+        self.walls = maze.getWallMask()
+        self.g = {}
+        self.rhs = {}
+        self.frontier = []
+        self.queued = {}    # cell -> key it is queued with; other heap entries are stale
+        self.km = 0
+        start = maze.getStart() if start is None else start
+        self.start = self.cellOf(start)
+        self.last = self.start
+        self.goals = set()
+        self.set_objectives(maze.getObjectives() if objectives is None else objectives)
+
+    def cellOf(self, position):
+        return position[0] * self.cols + position[1]
+
+    def heuristic(self, cell):
+        row, col = divmod(cell, self.cols)
+        startRow, startCol = divmod(self.start, self.cols)
+        return abs(row - startRow) + abs(col - startCol)
+
+    def neighbors(self, cell):
+        row, col = divmod(cell, self.cols)
+        walls = self.walls
+        if row + 1 < self.rows and not walls[cell + self.cols]:
+            yield cell + self.cols
+        if row > 0 and not walls[cell - self.cols]:
+            yield cell - self.cols
+        if col + 1 < self.cols and not walls[cell + 1]:
+            yield cell + 1
+        if col > 0 and not walls[cell - 1]:
+            yield cell - 1
+
+    def key(self, cell):
+        best = min(self.g.get(cell, INF), self.rhs.get(cell, INF))
+        return (best + self.heuristic(cell) + self.km, best)
+
+    # recomputes the one-step lookahead of cell and (re)queues it if inconsistent
+    def updateVertex(self, cell):
+        if cell in self.goals:
+            self.rhs[cell] = INF if self.walls[cell] else 0
+        else:
+            best = INF
+            if not self.walls[cell]:
+                g = self.g
+                for neighbor in self.neighbors(cell):
+                    cost = g.get(neighbor, INF) + 1
+                    if cost < best:
+                        best = cost
+            self.rhs[cell] = best
+        self.queued.pop(cell, None)
+        if self.g.get(cell, INF) != self.rhs.get(cell, INF):
+            key = self.key(cell)
+            self.queued[cell] = key
+            heapq.heappush(self.frontier, (key, cell))
+
+    def topKey(self):
+        frontier = self.frontier
+        while frontier and self.queued.get(frontier[0][1]) != frontier[0][0]:
+            heapq.heappop(frontier)
+        return frontier[0][0] if frontier else (INF, INF)
+
+    # processes inconsistent cells until the start is consistent and no queued
+    # cell could still shorten its path. returns the number of cells expanded
+    def computeShortestPath(self):
+        expanded = 0
+        g, rhs = self.g, self.rhs
+        while self.topKey() < self.key(self.start) or rhs.get(self.start, INF) != g.get(self.start, INF):
+            oldKey, cell = heapq.heappop(self.frontier)
+            del self.queued[cell]
+            newKey = self.key(cell)
+            expanded += 1
+            if oldKey < newKey:
+                self.queued[cell] = newKey
+                heapq.heappush(self.frontier, (newKey, cell))
+            elif g.get(cell, INF) > rhs.get(cell, INF):
+                g[cell] = rhs[cell]
+                for neighbor in self.neighbors(cell):
+                    self.updateVertex(neighbor)
+            else:
+                g[cell] = INF
+                self.updateVertex(cell)
+                for neighbor in self.neighbors(cell):
+                    self.updateVertex(neighbor)
+        return expanded
+
+    # Returns (path, num_states_explored) for the current start and
+    # objectives, where path runs from the start to the nearest objective and
+    # is [] if none is reachable
+    def plan(self):
+        expanded = self.computeShortestPath()
+        cell = self.start
+        if self.g.get(cell, INF) == INF:
+            return [], expanded
+        path = [self.maze.getCellPos(cell)]
+        while cell not in self.goals:
+            cell = min(self.neighbors(cell), key=lambda neighbor: self.g.get(neighbor, INF))
+            path.append(self.maze.getCellPos(cell))
+        return path, expanded
+
+    # Moves the start to pos, e.g. after the agent took a step
+    def move_start(self, pos):
+        cell = self.cellOf(pos)
+        if cell == self.start:
+            return
+        self.start = cell
+        self.km += self.heuristic(self.last)
+        self.last = cell
+
+    # Adds or removes the wall at (r, c) in the maze and repairs the cells
+    # whose lookahead depends on it. raises IndexError, as Maze.setWall
+    # does, if (r, c) is outside the maze
+    def set_wall(self, r, c, blocked):
+        if not (0 <= r < self.rows and 0 <= c < self.cols):
+            raise IndexError("wall position (%d, %d) is outside the %dx%d maze" % (r, c, self.rows, self.cols))
+        if self.maze.isWall(r, c) == blocked:
+            return
+        cell = r * self.cols + c
+        self.maze.setWall(r, c, blocked)
+        if blocked:
+            self.g[cell] = INF
+        self.updateVertex(cell)
+        for neighbor in self.neighbors(cell):
+            self.updateVertex(neighbor)
+
+    # Replaces the objectives the planner leads to
+    def set_objectives(self, objectives):
+        goals = set(self.cellOf(objective) for objective in objectives)
+        removed = self.goals - goals
+        added = goals - self.goals
+        self.goals = goals
+        for cell in added | removed:
+            self.updateVertex(cell)
@@ -0,0 +1,222 @@
+# resultcache.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the result cache search() answers repeated queries from.
+A result is keyed by the content hash of the grid, the start, the sorted
+objectives, the method and its options, and kept as an array of cell ids in
+an LRU bounded by an estimate of its memory. With a directory configured,
+results also go to disk, so they outlive the process.
+
+The results of methods that find shortest paths to a single objective also
+serve sub-queries: any stretch of a shortest path is a shortest path between
+its ends, so a query from one cell of a cached path to another is answered
+by slicing it, with no states explored. Only paths the same method and
+options found are sliced, so that comparing methods stays meaningful.
+"""
+
+import hashlib
+import os
+import struct
+from array import array
+from collections import OrderedDict
+
+import distcache
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_MAX_BYTES = 256 * 1024 * 1024
+
+# the methods whose single-objective paths are always shortest
+SHORTEST_METHODS = ("bfs", "bibfs", "biastar", "jps", "junction")
+
+# rough bytes of bookkeeping per entry, and per cell of an indexed path
+ENTRY_BYTES = 256
+INDEX_BYTES = 100
+
+MAGIC = b'MRC1'
+
+# header: magic, digest of the key, states explored, number of cells
+HEADER = struct.Struct('<4s20sqI')
+
+class ResultCache:
+    def __init__(self, maxBytes=DEFAULT_MAX_BYTES, directory=None, diskMaxBytes=DEFAULT_DISK_MAX_BYTES):
+        self.maxBytes = maxBytes
+        self.directory = directory
+        self.diskMaxBytes = diskMaxBytes
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # key -> (cell ids, states explored, whether indexed, bytes), least
+        # recently used first
+        self.entries = OrderedDict()
+        # (content hash, method, options) -> {cell: {key: position}} over the
+        # shortest paths cached, so that a sub-path is found from its ends
+        self.shortest = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.diskHits = 0
+        self.subpathHits = 0
+        self.evictions = 0
+
+    # the key of searchMethod with options on maze as it is now
+    def key(self, maze, searchMethod, options):
+        start = maze.getStart()
+        return (maze.getContentHash(), tuple(start) if start is not None else None,
+                tuple(sorted(maze.getObjectives())), searchMethod, tuple(sorted(options.items())))
+
+    # Returns the path and states explored cached for key, or None. a single
+    # objective query of a shortest path method is also looked up as a
+    # sub-path of the cached shortest paths
+    def get(self, maze, key):
+        entry = self.entries.get(key)
+        if entry is None and self.directory:
+            entry = self.load(key)
+            if entry is not None:
+                self.diskHits += 1
+                self.add(key, entry[0], entry[1])
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return [maze.getCellPos(cell) for cell in entry[0]], entry[1]
+        contentHash, start, objectives, searchMethod, options = key
+        if searchMethod in SHORTEST_METHODS and start is not None and len(objectives) == 1:
+            cells = self.subpath((contentHash, searchMethod, options), maze.getCellId(start[0], start[1]),
+                                 maze.getCellId(objectives[0][0], objectives[0][1]))
+            if cells is not None:
+                self.subpathHits += 1
+                return [maze.getCellPos(cell) for cell in cells], 0
+        self.misses += 1
+        return None
+
+    # Caches the result of the query key, path and states explored
+    def put(self, maze, key, path, statesExplored):
+        cells = array('i', [maze.getCellId(row, col) for row, col in path])
+        self.add(key, cells, statesExplored)
+        if self.directory:
+            self.store(key, cells, statesExplored)
+
+    def add(self, key, cells, statesExplored):
+        if key in self.entries:
+            return
+        contentHash, start, objectives, searchMethod, options = key
+        indexed = searchMethod in SHORTEST_METHODS and len(objectives) == 1 and len(cells) > 1
+        size = ENTRY_BYTES + cells.itemsize * len(cells) + (INDEX_BYTES * len(cells) if indexed else 0)
+        if size > self.maxBytes:
+            return
+        self.entries[key] = (cells, statesExplored, indexed, size)
+        self.bytes += size
+        if indexed:
+            index = self.shortest.setdefault((contentHash, searchMethod, options), {})
+            for position, cell in enumerate(cells):
+                index.setdefault(cell, {})[key] = position
+        while self.bytes > self.maxBytes:
+            oldKey, (oldCells, oldExplored, oldIndexed, oldSize) = self.entries.popitem(last=False)
+            self.bytes -= oldSize
+            self.evictions += 1
+            if oldIndexed:
+                self.unindex(oldKey, oldCells)
+
+    # takes the cells of the evicted shortest path key out of the index
+    def unindex(self, key, cells):
+        group = (key[0], key[3], key[4])
+        index = self.shortest[group]
+        for cell in cells:
+            paths = index[cell]
+            del paths[key]
+            if not paths:
+                del index[cell]
+        if not index:
+            del self.shortest[group]
+
+    # Returns the cell ids from cell source to cell target along a cached
+    # shortest path holding both, found on the maze with the content hash,
+    # method and options of group, or None. costs as much as the fewer of the
+    # paths through source and through target
+    def subpath(self, group, source, target):
+        index = self.shortest.get(group)
+        if index is None or source not in index or target not in index:
+            return None
+        sources, targets = index[source], index[target]
+        if len(targets) < len(sources):
+            sources, targets = targets, sources
+        for key in sources:
+            if key in targets:
+                first, last = index[source][key], index[target][key]
+                cells = self.entries[key][0]
+                self.entries.move_to_end(key)
+                if first <= last:
+                    return list(cells[first:last + 1])
+                return list(cells[last:first + 1])[::-1]
+        return None
+
+    def entryPath(self, key):
+        return os.path.join(self.directory, '%s.mrc' % digest(key).hex())
+
+    # Returns (cell ids, states explored) stored on disk for key, or None.
+    # corrupt or mismatched files are removed and treated as misses
+    def load(self, key):
+        path = self.entryPath(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            magic, keyDigest, statesExplored, count = HEADER.unpack_from(data)
+            if magic != MAGIC or keyDigest != digest(key) or len(data) != HEADER.size + 4 * count:
+                raise ValueError("mismatched entry")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error):
+            distcache.discard(path)
+            return None
+        cells = array('i')
+        cells.frombytes(data[HEADER.size:])
+        try:
+            os.utime(path)      # the mtime is the recency used for eviction
+        except OSError:
+            pass
+        return cells, statesExplored
+
+    def store(self, key, cells, statesExplored):
+        path = self.entryPath(key)
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, digest(key), statesExplored, len(cells)) + cells.tobytes())
+            os.replace(tmp, path)
+        except OSError:
+            distcache.discard(tmp)
+            return
+        distcache.evict_lru(self.directory, '.mrc', self.diskMaxBytes)
+
+    def toDict(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.diskHits,
+            "subpath_hits": self.subpathHits,
+            "evictions": self.evictions,
+        }
+
+def digest(key):
+    return hashlib.sha1(repr(key).encode()).digest()
+
+default_cache = None
+
+# Sets up the process-wide cache search() uses. maxBytes defaults to
+# MAZE_RESULT_CACHE_BYTES, and the cache is off (0) unless that is set, so
+# that callers of search() pay nothing for it unless asked; the disk tier is
+# used with a directory or MAZE_RESULT_CACHE_DIR
+def configure(maxBytes=None, directory=None):
+    global default_cache
+    if maxBytes is None:
+        maxBytes = int(os.environ.get('MAZE_RESULT_CACHE_BYTES', 0))
+    directory = directory or os.environ.get('MAZE_RESULT_CACHE_DIR')
+    default_cache = ResultCache(maxBytes, directory) if maxBytes > 0 else None
+    return default_cache
+
+configure()
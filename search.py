@@ -19,277 +19,720 @@ files and classes when code is run, so be careful to not modify anything else.
 # to the positions of the path taken by your search algorithm.
 # Number of states explored should be a number.
 # maze is a Maze object based on the maze from the file specified by input filename
-# searchMethod is the search method specified by --method flag (bfs,dfs,greedy,astar)
+# searchMethod is the search method specified by --method flag, one of the keys of methods
 
 from collections import deque
 import heapq
+from multidot import multi_astar
+import jps as jump_point
+import junctions
+import hpa as hierarchical
+import ara as anytime
+from steps import EXPANDED, REACHED, COUNTED, drain
+from spatial import ObjectiveIndex
+from cellarrays import acquire, release
+from frontier import make_frontier
+import resultcache
 #import pdb; pdb.set_trace()
 
-#compute and return the Manhattan distance between two positions
-def manhattan(pos1, pos2):
-    xdist = abs(pos1[0]-pos2[0]);
-    ydist = abs(pos1[1]-pos2[1]);
-    return xdist + ydist
-
-def min_manhattan(pos, objective_list):
-    min = float("inf")
-    for objective in objective_list:
-        curr_man = manhattan(pos, objective)
-        if curr_man < min:
-            min = curr_man
-    return min
-
-
-def search(maze, searchMethod):
-    return {
-        "bfs": bfs,
-        "dfs": dfs,
-        "greedy": greedy,
-        "astar": astar,
-    }.get(searchMethod)(maze)
+#compute and return the Manhattan distance between cell id cell and (row, col)
+def cell_distance(cell, row, col, cols):
+    return abs(cell // cols - row) + abs(cell % cols - col)
 
-# return path, num_states_explored
-def bfs(maze):
-    current = maze.getStart()
-    frontier = deque([current])
-    backtrack = {current : (-1, -1)}
+# the path of positions from the root of a search tree to cell, following the
+# parent cell ids until -1
+def trace_path(maze, parent, cell):
+    cells = []
+    while cell != -1:
+        cells.append(cell)
+        cell = parent[cell]
+    cells.reverse()
+    getCellPos = maze.getCellPos
+    return [getCellPos(cell) for cell in cells]
 
-    if len(maze.getObjectives()) == 1:
-        while len(frontier) != 0:
-            if maze.isObjective(current[0], current[1]):
-                break
-            current = frontier.popleft()
-            neighbors = maze.getNeighbors(current[0], current[1])
-            for neighbor in neighbors:
-                if neighbor not in backtrack:       # make sure only add unexplored nodes
-                    backtrack[neighbor] = current
-                    frontier.append(neighbor)
-        path = []
-        while current != (-1, -1):
-            path.append(current)
-            current = backtrack[current]
-        return path[::-1], len(backtrack)
-    else:
-        objective_list = maze.getObjectives()
-        path = []
-        num_states_explored = 0
-        while len(objective_list) != 0:
+
+# options are passed on to the search method, see METHOD_OPTIONS. repeated
+# queries are answered from resultcache.default_cache when it is on, except
+# those given a budget, whose result depends on when it ran out
+def search(maze, searchMethod, **options):
+    cache = resultcache.default_cache
+    if cache is None or searchMethod not in methods or any(name in options for name in BUDGET_OPTIONS):
+        return methods.get(searchMethod)(maze, **options)
+    key = cache.key(maze, searchMethod, options)
+    result = cache.get(maze, key)
+    if result is None:
+        result = methods.get(searchMethod)(maze, **options)
+        cache.put(maze, key, result[0], result[1])
+    return result
+
+# returns the step-wise generator of searchMethod on maze, see steps.py
+def search_steps(maze, searchMethod, **options):
+    return step_methods.get(searchMethod)(maze, **options)
+
+# The searches below run on cell ids (row * cols + col) over the maze's
+# neighbor table, keeping their state in pooled CellArrays instead of dicts of
+# position tuples. Positions are only created for the path they return
+
+# yields the expansion events of bfs, returns path, num_states_explored
+def bfs_steps(maze):
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    objectives = maze.getObjectives()
+    arrays = acquire(maze.rows * cols)
+    visited, parent = arrays.visited, arrays.parent
+    try:
+        start = maze.getStart()
+        current = start[0] * cols + start[1]
+        visited[current] = 1
+        parent[current] = -1
+        frontier = deque([current])
+        explored = 1
+        reads = 0       # neighbor lists read
+
+        if len(objectives) == 1:
+            goal = objectives[0][0] * cols + objectives[0][1]
             while len(frontier) != 0:
+                if current == goal:
+                    break
                 current = frontier.popleft()
-                if current in objective_list:
-                    objective_list.remove(current)
+                pushed = []
+                for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                    if not visited[neighbor]:       # make sure only add unexplored nodes
+                        visited[neighbor] = 1
+                        parent[neighbor] = current
+                        pushed.append(neighbor)
+                explored += len(pushed)
+                frontier.extend(pushed)
+                reads += 1
+                yield EXPANDED, current, pushed, len(frontier), explored
+            if current != goal:
+                yield COUNTED, {"neighbor_calls": reads}
+                return [], explored
+            yield REACHED, objectives[0]
+            yield COUNTED, {"neighbor_calls": reads}
+            return trace_path(maze, parent, current), explored
+        else:
+            remaining = set(objective[0] * cols + objective[1] for objective in objectives)
+            path = []
+            num_states_explored = 0
+            while len(remaining) != 0:
+                reached = False
+                while len(frontier) != 0:
+                    current = frontier.popleft()
+                    if current in remaining:
+                        remaining.remove(current)
+                        reached = True
+                        yield REACHED, maze.getCellPos(current)
+                        break
+                    pushed = []
+                    for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                        if not visited[neighbor]:
+                            visited[neighbor] = 1
+                            parent[neighbor] = current
+                            pushed.append(neighbor)
+                    num_states_explored += len(pushed)
+                    explored += len(pushed)
+                    frontier.extend(pushed)
+                    reads += 1
+                    yield EXPANDED, current, pushed, len(frontier), explored
+                if not reached:
+                    yield COUNTED, {"neighbor_calls": reads}
+                    return [], num_states_explored
+                # the next leg starts over from the objective just reached
+                path.extend(trace_path(maze, parent, current)[:-1])
+                arrays.clear()
+                visited[current] = 1
+                parent[current] = -1
+                frontier = deque([current])
+                explored = 1
+            path.append(maze.getCellPos(current))
+            yield COUNTED, {"neighbor_calls": reads}
+            return path, num_states_explored
+    finally:
+        release(arrays)
+
+
+# yields the expansion events of dfs, returns path, num_states_explored
+def dfs_steps(maze):
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    objectives = maze.getObjectives()
+    arrays = acquire(maze.rows * cols)
+    visited, parent = arrays.visited, arrays.parent
+    try:
+        start = maze.getStart()
+        current = start[0] * cols + start[1]
+        visited[current] = 1
+        parent[current] = -1
+        frontier = [current]
+        explored = 1
+        reads = 0       # neighbor lists read
+
+        if len(objectives) == 1:
+            goal = objectives[0][0] * cols + objectives[0][1]
+            while len(frontier) != 0:
+                if current == goal:
                     break
-                neighbors = maze.getNeighbors(current[0],current[1])
-                for neighbor in neighbors:
-                    if neighbor not in backtrack:
-                        backtrack[neighbor] = current
-                        num_states_explored += 1
-                        frontier.append(neighbor)
-            offset = len(path)
-            current_obj = current
-            while current != (-1,-1):
-                path.insert(offset,current)
-                current = backtrack[current]
-            path.pop()
-            current = current_obj
-            frontier = deque([current])
-            backtrack.clear()
-            backtrack[current] = (-1,-1)
-        path.append(current)
-        return path, num_states_explored
+                current = frontier.pop()
+                pushed = []
+                for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                    if not visited[neighbor]:       # make sure only add unexplored nodes
+                        visited[neighbor] = 1
+                        parent[neighbor] = current
+                        pushed.append(neighbor)
+                explored += len(pushed)
+                frontier.extend(pushed)
+                reads += 1
+                yield EXPANDED, current, pushed, len(frontier), explored
+            if current != goal:
+                yield COUNTED, {"neighbor_calls": reads}
+                return [], explored
+            yield REACHED, objectives[0]
+            yield COUNTED, {"neighbor_calls": reads}
+            return trace_path(maze, parent, current), explored
+        else:
+            remaining = set(objective[0] * cols + objective[1] for objective in objectives)
+            path = []
+            num_states_explored = 0
+            while len(remaining) != 0:
+                reached = False
+                while len(frontier) != 0:
+                    current = frontier.pop()
+                    if current in remaining:
+                        remaining.remove(current)
+                        reached = True
+                        yield REACHED, maze.getCellPos(current)
+                        break
+                    pushed = []
+                    for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                        if not visited[neighbor]:
+                            visited[neighbor] = 1
+                            parent[neighbor] = current
+                            pushed.append(neighbor)
+                    num_states_explored += len(pushed)
+                    explored += len(pushed)
+                    frontier.extend(pushed)
+                    reads += 1
+                    yield EXPANDED, current, pushed, len(frontier), explored
+                if not reached:
+                    yield COUNTED, {"neighbor_calls": reads}
+                    return [], num_states_explored
+                path.extend(trace_path(maze, parent, current)[:-1])
+                arrays.clear()
+                visited[current] = 1
+                parent[current] = -1
+                frontier = [current]
+                explored = 1
+            path.append(maze.getCellPos(current))
+            yield COUNTED, {"neighbor_calls": reads}
+            return path, num_states_explored
+    finally:
+        release(arrays)
 
 
-# return path, num_states_explored
-def dfs(maze):
-    frontier = [maze.getStart()]
-    backtrack = {maze.getStart() : (-1, -1)}
+# yields the expansion events of astar, returns path, num_states_explored.
+# frontier and tie pick the priority queue and its tie-breaking, see frontier.py
+def astar_steps(maze, frontier="heap", tie="position"):
+    objectives = maze.getObjectives()
+    if len(objectives) != 1:
+        # multi objective: optimal tour over exact objective distances. the
+        # tour is planned as a whole, so its work is reported in one COUNTED
+        # event and then only the objectives are
+        counts = {}
+        path, num_states_explored = multi_astar(maze, counts=counts)
+        yield COUNTED, counts
+        remaining = set(objectives)
+        for position in path:
+            if position in remaining:
+                remaining.discard(position)
+                yield REACHED, position
+        return path, num_states_explored
 
-    if len(maze.getObjectives()) == 1:
-        current = maze.getStart()
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    size = maze.rows * cols
+    arrays = acquire(size)
+    visited, parent, cost = arrays.visited, arrays.parent, arrays.cost
+    try:
+        goalRow, goalCol = objectives[0]
+        goal = goalRow * cols + goalCol
+        start = maze.getStart()
+        current = start[0] * cols + start[1]
+        visited[current] = 1
+        parent[current] = -1
+        cost[current] = 0
+        explored = 1
+        reads = heuristics = 0
+        frontier = make_frontier(frontier, size, tie)
+        push, pop, scale, ranks = frontier.push, frontier.pop, frontier.scale, frontier.ranks
+        push(current)
         while len(frontier) != 0:
-            if maze.isObjective(current[0], current[1]):
+            if current == goal:
                 break
-            current = frontier.pop()
-            neighbors = maze.getNeighbors(current[0], current[1])
-            for neighbor in neighbors:
-                if neighbor not in backtrack:       # make sure only add unexplored nodes
-                    backtrack[neighbor] = current
-                    frontier.append(neighbor)
-        path = []
-        while current != (-1, -1):
-            path.append(current)
-            current = backtrack[current]
-        return path[::-1], len(backtrack)
-    else:
-        objective_list = maze.getObjectives()
-        path = []
-        num_states_explored = 0
-        while len(objective_list) != 0:
+            current = pop() % size
+            g = cost[current] + 1
+            pushed = []
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if not visited[neighbor]:       # make sure only add unexplored nodes
+                    visited[neighbor] = 1
+                    parent[neighbor] = current
+                    cost[neighbor] = g
+                    f = g + cell_distance(neighbor, goalRow, goalCol, cols)
+                    push(f * scale + neighbor if ranks is None else frontier.key(f, neighbor, g))
+                    pushed.append(neighbor)
+            explored += len(pushed)
+            reads += 1
+            heuristics += len(pushed)
+            yield EXPANDED, current, pushed, len(frontier), explored
+        if current != goal:
+            yield COUNTED, {"neighbor_calls": reads, "heuristic_calls": heuristics}
+            return [], explored
+        yield REACHED, objectives[0]
+        yield COUNTED, {"neighbor_calls": reads, "heuristic_calls": heuristics}
+        return trace_path(maze, parent, current), explored
+    finally:
+        release(arrays)
+
+
+# yields the expansion events of greedy, returns path, num_states_explored.
+# frontier and tie pick the priority queue and its tie-breaking, see frontier.py
+def greedy_steps(maze, frontier="heap", tie="position"):
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    size = maze.rows * cols
+    objectives = maze.getObjectives()
+    arrays = acquire(size)
+    visited, parent, cost = arrays.visited, arrays.parent, arrays.cost
+    kind = frontier
+    try:
+        start = maze.getStart()
+        current = start[0] * cols + start[1]
+        visited[current] = 1
+        parent[current] = -1
+        cost[current] = 0
+        explored = 1
+        reads = heuristics = 0
+        frontier = make_frontier(kind, size, tie)
+        push, pop, scale, ranks = frontier.push, frontier.pop, frontier.scale, frontier.ranks
+        push(current)
+
+        if len(objectives) == 1:
+            goalRow, goalCol = objectives[0]
+            goal = goalRow * cols + goalCol
             while len(frontier) != 0:
-                current = frontier.pop()
-                if current in objective_list:
-                    objective_list.remove(current)
+                if current == goal:
                     break
-                neighbors = maze.getNeighbors(current[0],current[1])
-                for neighbor in neighbors:
-                    if neighbor not in backtrack:
-                        num_states_explored += 1
-                        backtrack[neighbor] = current
-                        frontier.append(neighbor)
-            current_obj = current
-            offset = len(path)
-            while current != (-1, -1):
-                # print("current:" + str(current))
-                path.insert(offset, current)
-                current = backtrack[current]
-            path.pop()
-            current = current_obj
-            frontier = [current]
-            backtrack.clear()
-            backtrack = {current : (-1, -1)}
-        path.append(current)
-        return path, num_states_explored
+                current = pop() % size
+                g = cost[current] + 1
+                pushed = []
+                for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                    if not visited[neighbor]:       # make sure only add unexplored nodes
+                        visited[neighbor] = 1
+                        parent[neighbor] = current
+                        cost[neighbor] = g
+                        h = cell_distance(neighbor, goalRow, goalCol, cols)
+                        push(h * scale + neighbor if ranks is None else frontier.key(h, neighbor, g))
+                        pushed.append(neighbor)
+                explored += len(pushed)
+                reads += 1
+                heuristics += len(pushed)
+                yield EXPANDED, current, pushed, len(frontier), explored
+            if current != goal:
+                yield COUNTED, {"neighbor_calls": reads, "heuristic_calls": heuristics}
+                return [], explored
+            yield REACHED, objectives[0]
+            yield COUNTED, {"neighbor_calls": reads, "heuristic_calls": heuristics}
+            return trace_path(maze, parent, current), explored
+        else:
+            # remaining objectives, indexed for the nearest objective heuristic
+            objective_index = ObjectiveIndex(objectives)
+            remaining = set(objective[0] * cols + objective[1] for objective in objectives)
+            num_states_explored = 0
+            path = []
+            while len(remaining) != 0:
+                reached = False
+                while len(frontier) != 0:
+                    current = pop() % size
+                    if current in remaining:
+                        remaining.remove(current)
+                        objective_index.remove(maze.getCellPos(current))
+                        reached = True
+                        yield REACHED, maze.getCellPos(current)
+                        break
+                    g = cost[current] + 1
+                    pushed = []
+                    for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                        if not visited[neighbor]:
+                            visited[neighbor] = 1
+                            parent[neighbor] = current
+                            cost[neighbor] = g
+                            h = objective_index.nearestAt(neighbor // cols, neighbor % cols)
+                            push(h * scale + neighbor if ranks is None else frontier.key(h, neighbor, g))
+                            pushed.append(neighbor)
+                    num_states_explored += len(pushed)
+                    explored += len(pushed)
+                    reads += 1
+                    heuristics += len(pushed)
+                    yield EXPANDED, current, pushed, len(frontier), explored
+                if not reached:
+                    yield COUNTED, {"neighbor_calls": reads, "heuristic_calls": heuristics}
+                    return [], num_states_explored
+                path.extend(trace_path(maze, parent, current)[:-1])
+                arrays.clear()
+                visited[current] = 1
+                parent[current] = -1
+                cost[current] = 0
+                frontier = make_frontier(kind, size, tie)
+                push, pop = frontier.push, frontier.pop
+                push(current)
+                explored = 1
+            path.append(maze.getCellPos(current))
+            yield COUNTED, {"neighbor_calls": reads, "heuristic_calls": heuristics}
+            return path, num_states_explored
+    finally:
+        release(arrays)
 
 
+# joins the two halves of a bidirectional search at meet. forward and backward
+# are the parent arrays towards the start and the goal respectively
+def join_paths(maze, forward, backward, meet):
+    path = trace_path(maze, forward, meet)
+    current = backward[meet]
+    while current != -1:
+        path.append(maze.getCellPos(current))
+        current = backward[current]
+    return path
 
+# expands one full layer of a bidirectional bfs, yielding its expansion events.
+# own and other are the visited arrays of this side and the other one, parent
+# this side's parent array. waiting is the size of the other side's frontier
+# and visited the cells visited so far by both, counted into the events.
+# returns the next layer, the first cell also reached from the other side (-1
+# if none), the new visited count and the number of cells expanded. every
+# meeting found in a layer closes a path of the same length, so the first one
+# is optimal
+def expand_layer(offsets, targets, frontier, own, parent, other, waiting, visited):
+    next_frontier = []
+    remaining = len(frontier) + waiting
+    expanded = 0
+    for current in frontier:
+        remaining -= 1
+        expanded += 1
+        pushed = []
+        for neighbor in targets[offsets[current]:offsets[current + 1]]:
+            if not own[neighbor]:
+                own[neighbor] = 1
+                parent[neighbor] = current
+                pushed.append(neighbor)
+                if other[neighbor]:
+                    visited += len(pushed)
+                    yield EXPANDED, current, pushed, remaining + len(next_frontier) + len(pushed), visited
+                    return next_frontier, neighbor, visited, expanded
+        next_frontier.extend(pushed)
+        visited += len(pushed)
+        yield EXPANDED, current, pushed, remaining + len(next_frontier), visited
+    return next_frontier, -1, visited, expanded
 
-# return path, num_states_explored
-def astar(maze):
-    if len(maze.getObjectives()) == 1:
-        #use heapq, make frontier a priority queue based on estimated path cost
-        #stores tuple (g+h, [position])
-        frontier = []
-        #backtrack is dictionary, stores position, previous position, and distance along path
-        current = maze.getStart()
-        backtrack = {current : ((-1,-1),0)}
-        #inserts tuple in frontier
-        current_tup = (manhattan(current,maze.getObjectives()[0]), current)
-        heapq.heappush(frontier, (manhattan(current,maze.getObjectives()[0]), current))
-        goal = maze.getObjectives()[0]
+# yields the expansion events of bibfs, returns path, num_states_explored
+def bibfs_steps(maze):
+    objectives = maze.getObjectives()
+    if len(objectives) != 1:
+        return (yield from bfs_steps(maze))
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    forward = acquire(maze.rows * cols)
+    backward = acquire(maze.rows * cols)
+    try:
+        start = maze.getStart()
+        start = start[0] * cols + start[1]
+        goal = objectives[0][0] * cols + objectives[0][1]
+        forward.visited[start] = 1
+        forward.parent[start] = -1
+        backward.visited[goal] = 1
+        backward.parent[goal] = -1
+        visited = 2
+        forward_frontier = [start]
+        backward_frontier = [goal]
+        meet = start if start == goal else -1
+        reads = 0
+        while meet == -1 and len(forward_frontier) != 0 and len(backward_frontier) != 0:
+            # always grow the smaller frontier
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meet, visited, expanded = yield from expand_layer(
+                    offsets, targets, forward_frontier, forward.visited, forward.parent,
+                    backward.visited, len(backward_frontier), visited)
+            else:
+                backward_frontier, meet, visited, expanded = yield from expand_layer(
+                    offsets, targets, backward_frontier, backward.visited, backward.parent,
+                    forward.visited, len(forward_frontier), visited)
+            reads += expanded
+        yield COUNTED, {"neighbor_calls": reads}
+        if meet == -1:
+            return [], visited
+        yield REACHED, objectives[0]
+        return join_paths(maze, forward.parent, backward.parent, meet), visited
+    finally:
+        release(forward)
+        release(backward)
+
+# yields the expansion events of biastar, returns path, num_states_explored
+def biastar_steps(maze):
+    objectives = maze.getObjectives()
+    if len(objectives) != 1:
+        return (yield from astar_steps(maze))
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    size = maze.rows * cols
+    # index 0 searches forward from the start, index 1 backward from the goal.
+    # a visited byte is 1 once a cell is discovered and 2 once it is closed
+    sides = (acquire(size), acquire(size))
+    try:
+        start = maze.getStart()
+        goal = objectives[0]
+        ends = (start[0] * cols + start[1], goal[0] * cols + goal[1])
+        targetRows = (goal[0], start[0])
+        targetCols = (goal[1], start[1])
+        frontiers = ([], [])
+        for side in (0, 1):
+            cell = ends[side]
+            sides[side].visited[cell] = 1
+            sides[side].parent[cell] = -1
+            sides[side].cost[cell] = 0
+            heapq.heappush(frontiers[side], cell_distance(cell, targetRows[side], targetCols[side], cols) * size + cell)
+        explored = 2
+        reads = 0
+        heuristics = 2
+        best = 0 if ends[0] == ends[1] else float("inf")
+        meet = ends[0] if ends[0] == ends[1] else -1
+        while len(frontiers[0]) != 0 and len(frontiers[1]) != 0:
+            # every path not yet found costs at least the smallest f on either side
+            if best <= max(frontiers[0][0] // size, frontiers[1][0] // size):
+                break
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            own, other = sides[side], sides[1 - side]
+            visited, parent, costs = own.visited, own.parent, own.cost
+            current = heapq.heappop(frontiers[side]) % size
+            if visited[current] == 2:
+                continue
+            visited[current] = 2
+            cost = costs[current] + 1
+            pushed = []
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if not visited[neighbor] or cost < costs[neighbor]:
+                    if not visited[neighbor]:
+                        visited[neighbor] = 1
+                        explored += 1
+                    costs[neighbor] = cost
+                    parent[neighbor] = current
+                    heapq.heappush(frontiers[side], (cost + cell_distance(neighbor, targetRows[side], targetCols[side], cols)) * size + neighbor)
+                    pushed.append(neighbor)
+                    if other.visited[neighbor] and cost + other.cost[neighbor] < best:
+                        best = cost + other.cost[neighbor]
+                        meet = neighbor
+            reads += 1
+            heuristics += len(pushed)
+            yield EXPANDED, current, pushed, len(frontiers[0]) + len(frontiers[1]), explored
+        yield COUNTED, {"neighbor_calls": reads, "heuristic_calls": heuristics}
+        if meet == -1:
+            return [], explored
+        yield REACHED, goal
+        return join_paths(maze, sides[0].parent, sides[1].parent, meet), explored
+    finally:
+        release(sides[0])
+        release(sides[1])
+
+# yields the expansion events of jps, returns path, num_states_explored
+def jps_steps(maze):
+    if len(maze.getObjectives()) != 1:
+        return (yield from astar_steps(maze))
+    return (yield from jump_point.jps_steps(maze))
+
+# astar over the junction graph of the maze, see junctions.py. the graph is
+# compiled once per maze and reused by later queries
+def junction_steps(maze):
+    if len(maze.getObjectives()) != 1:
+        return (yield from astar_steps(maze))
+    return (yield from junctions.junction_steps(maze))
+
+# hierarchical astar over clusters of the maze, see hpa.py. the clusters are
+# precomputed once per maze and kept up to date as walls change
+def hpa_steps(maze):
+    if len(maze.getObjectives()) != 1:
+        return (yield from astar_steps(maze))
+    return (yield from hierarchical.hpa_steps(maze))
+
+# anytime repairing astar, see ara.py. stops once the path is shortest or the
+# budget of deadline_ms milliseconds or max_expansions expansions ran out
+def ara_steps(maze, deadline_ms=None, max_expansions=None):
+    if len(maze.getObjectives()) != 1:
+        return (yield from astar_steps(maze))
+    return (yield from anytime.ara_steps(maze, deadline_ms, max_expansions))
+
+# The plain single objective searches below run the same loops as bfs_steps,
+# dfs_steps, astar_steps and greedy_steps, with the same paths and counts, but
+# without building and yielding the events, which takes about a third longer
+# on large mazes
+
+# bfs with breadth, dfs without, on a single objective maze. returns path,
+# num_states_explored
+def plain_search(maze, breadth):
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    goal = maze.getObjectives()[0]
+    goal = goal[0] * cols + goal[1]
+    arrays = acquire(maze.rows * cols)
+    visited, parent = arrays.visited, arrays.parent
+    try:
+        start = maze.getStart()
+        current = start[0] * cols + start[1]
+        visited[current] = 1
+        parent[current] = -1
+        frontier = deque([current])
+        take = frontier.popleft if breadth else frontier.pop
+        append = frontier.append
+        explored = 1
         while len(frontier) != 0:
-            if maze.isObjective(current_tup[1][0], current_tup[1][1]):
+            if current == goal:
                 break
-            current_tup = heapq.heappop(frontier)
-            current_pos = current_tup[1]
-            neighbors = maze.getNeighbors(current_pos[0], current_pos[1])
-            for neighbor in neighbors:
-                if neighbor not in backtrack:       # make sure only add unexplored nodes
-                    backtrack[neighbor] = (current_pos, backtrack[current_pos][1]+1)
-                    heapq.heappush(frontier, (backtrack[neighbor][1] + manhattan(neighbor,goal) ,neighbor))
-        path = []
-        current = current_tup[1]
-        while current != (-1, -1):
-            path.append(current)
-            current = backtrack[current][0]
-        return path[::-1], len(backtrack)
-    #end if
-    else: # multi objective
-        objective_list = maze.getObjectives()
-        num_states_explored = 0
-        frontier = []   # maintains priority queue of tuples (float for g+h, tuple for pos)
-        current = maze.getStart()
-        backtrack = {current : ((-1,-1), 0)}
-        current_tup = (min_manhattan(current, objective_list), current)
-        heapq.heappush(frontier, (min_manhattan(current, objective_list), current))
-        path = []
-        while len(objective_list) != 0:
-            while len(frontier) != 0:
-                current_tup = heapq.heappop(frontier)
-                current_pos = current_tup[1]
-                if current_pos in objective_list:
-                    objective_list.remove(current_pos)
-                    break
-                neighbors = maze.getNeighbors(current_pos[0], current_pos[1])
-                for neighbor in neighbors:
-                    if neighbor not in backtrack:
-                        num_states_explored += 1
-                        backtrack[neighbor] = (current_pos, backtrack[current_pos][1] + 1)
-                        heapq.heappush(frontier, (backtrack[neighbor][1] + min_manhattan(neighbor, objective_list), neighbor))
-            # out of inner while loop now
-            offset = len(path)
-            current = (current_tup[1][0],current_tup[1][1])
-            while current != (-1, -1):
-                path.insert(offset, current)
-                current = backtrack[current][0]
-            path.pop()
-            frontier = []
-            current = (current_tup[1][0],current_tup[1][1])
-            heapq.heappush(frontier, (min_manhattan(current,objective_list), current))
-            # print("after new set, frontier len is now " + str(len(frontier)))
-            backtrack.clear()
-            backtrack = {current_tup[1] : ((-1,-1), 0)}
-        path.append(current_tup[1])
-        return path, num_states_explored
+            current = take()
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if not visited[neighbor]:       # make sure only add unexplored nodes
+                    visited[neighbor] = 1
+                    parent[neighbor] = current
+                    append(neighbor)
+                    explored += 1
+        if current != goal:
+            return [], explored
+        return trace_path(maze, parent, current), explored
+    finally:
+        release(arrays)
 
+# astar, or greedy with by_distance, on a single objective maze. returns
+# path, num_states_explored
+def plain_best_first(maze, frontier, tie, by_distance):
+    offsets, targets = maze.getNeighborTable()
+    cols = maze.cols
+    size = maze.rows * cols
+    arrays = acquire(size)
+    visited, parent, cost = arrays.visited, arrays.parent, arrays.cost
+    try:
+        goalRow, goalCol = maze.getObjectives()[0]
+        goal = goalRow * cols + goalCol
+        start = maze.getStart()
+        current = start[0] * cols + start[1]
+        visited[current] = 1
+        parent[current] = -1
+        cost[current] = 0
+        explored = 1
+        frontier = make_frontier(frontier, size, tie)
+        push, pop, scale, ranks = frontier.push, frontier.pop, frontier.scale, frontier.ranks
+        push(current)
+        while len(frontier) != 0:
+            if current == goal:
+                break
+            current = pop() % size
+            g = cost[current] + 1
+            for neighbor in targets[offsets[current]:offsets[current + 1]]:
+                if not visited[neighbor]:       # make sure only add unexplored nodes
+                    visited[neighbor] = 1
+                    parent[neighbor] = current
+                    cost[neighbor] = g
+                    f = abs(neighbor // cols - goalRow) + abs(neighbor % cols - goalCol)
+                    if not by_distance:
+                        f += g
+                    push(f * scale + neighbor if ranks is None else frontier.key(f, neighbor, g))
+                    explored += 1
+        if current != goal:
+            return [], explored
+        return trace_path(maze, parent, current), explored
+    finally:
+        release(arrays)
 
+# return path, num_states_explored
+def bfs(maze):
+    if len(maze.getObjectives()) == 1:
+        return plain_search(maze, True)
+    return drain(bfs_steps(maze))
 
+# return path, num_states_explored
+def dfs(maze):
+    if len(maze.getObjectives()) == 1:
+        return plain_search(maze, False)
+    return drain(dfs_steps(maze))
 
+# return path, num_states_explored
+def greedy(maze, frontier="heap", tie="position"):
+    if len(maze.getObjectives()) == 1:
+        return plain_best_first(maze, frontier, tie, True)
+    return drain(greedy_steps(maze, frontier, tie))
 
 # return path, num_states_explored
-def greedy(maze):
+def astar(maze, frontier="heap", tie="position"):
     if len(maze.getObjectives()) == 1:
-        #use heapq, make frontier a priority queue based on heuristic function h
-        #stores tuple (h, [position])
-        frontier = []
-        current = maze.getStart()
-        #backtrack is dictionary, stores position, previous position, and distance along path
-        backtrack = {current : (-1,-1)}
-        #inserts tuple in frontier
-        current_tup = (manhattan(current,goal), current)
-        heapq.heappush(frontier, (manhattan(current,goal), current));
-
-        goal = maze.getObjectives()[0]
-        while len(frontier) != 0:
-            if maze.isObjective(current_tup[1][0], current_tup[1][1]):
-                break
-            current_tup = heapq.heappop(frontier)
-            current_pos = current_tup[1]
-            neighbors = maze.getNeighbors(current_pos[0], current_pos[1])
-            for neighbor in neighbors:
-                if neighbor not in backtrack:       # make sure only add unexplored nodes
-                    backtrack[neighbor] = current_pos
-                    heapq.heappush(frontier, (manhattan(neighbor,goal) ,neighbor))
-        path = []
-        current = current_tup[1]
-        while current != (-1, -1):
-            path.append(current)
-            current = backtrack[current]
-        return path[::-1], len(backtrack)
-    #end if
-    else:
-        objective_list = maze.getObjectives()
-        num_states_explored = 0
-        frontier = []   # maintains priority queue of tuples (float for g+h, tuple for pos)
-        current = maze.getStart()
-        backtrack = {current : ((-1,-1), 0)}
-        current_tup = (min_manhattan(current, objective_list), current)
-        heapq.heappush(frontier, (min_manhattan(current, objective_list), current))
-        path = []
-        while len(objective_list) != 0:
-            while len(frontier) != 0:
-                current_tup = heapq.heappop(frontier)
-                current_pos = current_tup[1]
-                if current_pos in objective_list:
-                    objective_list.remove(current_pos)
-                    break
-                neighbors = maze.getNeighbors(current_pos[0], current_pos[1])
-                for neighbor in neighbors:
-                    if neighbor not in backtrack:
-                        num_states_explored += 1
-                        backtrack[neighbor] = (current_pos, backtrack[current_pos][1] + 1)
-                        heapq.heappush(frontier, (min_manhattan(neighbor, objective_list), neighbor))
-            # out of inner while loop now
-            offset = len(path)
-            current = (current_tup[1][0],current_tup[1][1])
-            while current != (-1, -1):
-                path.insert(offset, current)
-                current = backtrack[current][0]
-            path.pop()
-            frontier = []
-            current = (current_tup[1][0],current_tup[1][1])
-            heapq.heappush(frontier, (min_manhattan(current,objective_list), current))
-            # print("after new set, frontier len is now " + str(len(frontier)))
-            backtrack.clear()
-            backtrack = {current_tup[1] : ((-1,-1), 0)}
-        path.append(current_tup[1])
-        return path, num_states_explored
+        return plain_best_first(maze, frontier, tie, False)
+    return drain(astar_steps(maze, frontier, tie))
+
+# return path, num_states_explored
+def bibfs(maze):
+    return drain(bibfs_steps(maze))
+
+# return path, num_states_explored
+def biastar(maze):
+    return drain(biastar_steps(maze))
+
+# return path, num_states_explored
+def jps(maze):
+    return drain(jps_steps(maze))
+
+def junction(maze):
+    return drain(junction_steps(maze))
+
+def hpa(maze):
+    return drain(hpa_steps(maze))
+
+def ara(maze, deadline_ms=None, max_expansions=None):
+    return drain(ara_steps(maze, deadline_ms, max_expansions))
+
+
+# the search dispatch table, also used for the --method choices of mp1.py
+methods = {
+    "bfs": bfs,
+    "dfs": dfs,
+    "greedy": greedy,
+    "astar": astar,
+    "bibfs": bibfs,
+    "biastar": biastar,
+    "jps": jps,
+    "junction": junction,
+    "hpa": hpa,
+    "ara": ara,
+}
+
+# the keyword options each method takes besides the maze
+METHOD_OPTIONS = {
+    "greedy": ("frontier", "tie"),
+    "astar": ("frontier", "tie"),
+    "ara": ("deadline_ms", "max_expansions"),
+}
+
+# the options that may stop a search before it found a shortest path
+BUDGET_OPTIONS = ("deadline_ms", "max_expansions")
+
+# keeps the options searchMethod takes, so that one set of options can be
+# given to several methods
+def options_for(searchMethod, options):
+    return {name: value for name, value in options.items() if name in METHOD_OPTIONS.get(searchMethod, ())}
+
+# the step-wise generator of every method in methods
+step_methods = {
+    "bfs": bfs_steps,
+    "dfs": dfs_steps,
+    "greedy": greedy_steps,
+    "astar": astar_steps,
+    "bibfs": bibfs_steps,
+    "biastar": biastar_steps,
+    "jps": jps_steps,
+    "junction": junction_steps,
+    "hpa": hpa_steps,
+    "ara": ara_steps,
+}
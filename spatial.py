@@ -0,0 +1,100 @@
+# spatial.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains ObjectiveIndex, a bucketed grid over the objectives not yet
+reached. It answers the Manhattan distance from a position to the nearest
+remaining objective by searching the buckets in rings around the position,
+which stops after the first few rings instead of scanning every objective,
+and removes reached objectives in amortized constant time.
+"""
+
+import math
+
+INF = float("inf")
+
+class ObjectiveIndex:
+    def __init__(self, objectives):
+        self.build(set(tuple(objective) for objective in objectives))
+
+    # lays a grid of about one objective per bucket over objectives
+    def build(self, objectives):
+        self.count = self.built = len(objectives)
+        if not objectives:
+            self.bucketRows = self.bucketCols = 0
+            self.buckets = []
+            return
+        self.top = min(row for row, col in objectives)
+        self.left = min(col for row, col in objectives)
+        height = max(row for row, col in objectives) - self.top + 1
+        width = max(col for row, col in objectives) - self.left + 1
+        self.size = max(1, int(math.sqrt(height * width / len(objectives))))
+        self.bucketRows = (height - 1) // self.size + 1
+        self.bucketCols = (width - 1) // self.size + 1
+        self.buckets = [set() for i in range(self.bucketRows * self.bucketCols)]
+        for objective in objectives:
+            self.buckets[self.bucketOf(objective[0], objective[1])].add(objective)
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, position):
+        bucket = self.bucketOf(position[0], position[1])
+        return bucket is not None and position in self.buckets[bucket]
+
+    # index of the bucket holding (row, col), or None outside the objectives
+    def bucketOf(self, row, col):
+        if not self.buckets:
+            return None
+        bucketRow = (row - self.top) // self.size
+        bucketCol = (col - self.left) // self.size
+        if 0 <= bucketRow < self.bucketRows and 0 <= bucketCol < self.bucketCols:
+            return bucketRow * self.bucketCols + bucketCol
+        return None
+
+    def remove(self, position):
+        bucket = self.bucketOf(position[0], position[1])
+        if bucket is not None and position in self.buckets[bucket]:
+            self.buckets[bucket].remove(position)
+            self.count -= 1
+            # regrid once most buckets went empty, so rings stay short
+            if self.count * 4 < self.built:
+                self.build(set().union(*self.buckets))
+
+    # Manhattan distance from pos to the nearest remaining objective,
+    # inf if none remain
+    def nearest(self, pos):
+        return self.nearestAt(pos[0], pos[1])
+
+    # nearest for the position (row, col)
+    def nearestAt(self, row, col):
+        if self.count == 0:
+            return INF
+        size = self.size
+        centerRow = (row - self.top) // size
+        centerCol = (col - self.left) // size
+        # rings beyond this one contain no buckets
+        lastRing = max(centerRow, self.bucketRows - 1 - centerRow, centerCol, self.bucketCols - 1 - centerCol)
+        best = INF
+        ring = max(0, -centerRow, -centerCol, centerRow - self.bucketRows + 1, centerCol - self.bucketCols + 1)
+        while ring <= lastRing:
+            # every cell of a bucket ring buckets away is at least this far
+            if ring > 0 and (ring - 1) * size + 1 >= best:
+                break
+            for bucketRow in range(max(0, centerRow - ring), min(self.bucketRows, centerRow + ring + 1)):
+                if bucketRow in (centerRow - ring, centerRow + ring):
+                    bucketCols = range(max(0, centerCol - ring), min(self.bucketCols, centerCol + ring + 1))
+                else:
+                    bucketCols = [bucketCol for bucketCol in (centerCol - ring, centerCol + ring)
+                                  if 0 <= bucketCol < self.bucketCols]
+                for bucketCol in bucketCols:
+                    for objective in self.buckets[bucketRow * self.bucketCols + bucketCol]:
+                        distance = abs(row - objective[0]) + abs(col - objective[1])
+                        if distance < best:
+                            best = distance
+            ring += 1
+        return best
@@ -0,0 +1,78 @@
+# steps.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains the events yielded by the step-wise searches and the
+helpers that run them. A step-wise search is a generator that yields
+
+    (EXPANDED, cell, pushed, frontier_size, visited_size)
+                                    cell was taken off the frontier and pushed
+                                    lists the cells it added to it, after which
+                                    the frontier and the set of discovered
+                                    cells had the given sizes
+    (REACHED, position)             position is an objective the search reached
+    (IMPROVED, bound, cost)         an anytime search found a path of the given
+                                    cost, at most bound times the shortest
+    (COUNTED, counts)               the search reports work it counted itself,
+                                    a dict of SearchStats counters (see
+                                    instrument.py) to add, see add_counts
+
+where cells are cell ids (maze.getCellId / maze.getCellPos), and finally
+returns the usual (path, num_states_explored). Callers may stop
+iterating at any point to cancel the search.
+"""
+
+import collections
+import time
+
+EXPANDED = 0
+REACHED = 1
+IMPROVED = 2
+COUNTED = 3
+
+# the counters of a COUNTED event that hold a largest size rather than a count
+PEAK_COUNTS = ("peak_frontier", "peak_visited")
+
+# adds the counts of more into counts, keeping the larger of peak sizes
+def add_counts(counts, more):
+    for name, value in more.items():
+        if name in PEAK_COUNTS:
+            counts[name] = max(counts.get(name, 0), value)
+        else:
+            counts[name] = counts.get(name, 0) + value
+    return counts
+
+# runs steps to completion and returns its (path, num_states_explored). the
+# events are consumed by deque in C, but building and yielding them still
+# costs about a third of the search, see the plain searches of search.py
+def drain(steps):
+    result = []
+    def capture():
+        result.append((yield from steps))
+    collections.deque(capture(), maxlen=0)
+    return result[0]
+
+# Runs steps until it finishes, max_expansions positions were expanded or
+# max_seconds went by. returns (path, num_states_explored), or None if a budget
+# ran out first, in which case the search is closed
+def run_steps(steps, max_expansions=None, max_seconds=None):
+    deadline = None if max_seconds is None else time.perf_counter() + max_seconds
+    expansions = 0
+    try:
+        while True:
+            event = next(steps)
+            if event[0] != EXPANDED:
+                continue
+            expansions += 1
+            if max_expansions is not None and expansions > max_expansions:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+    except StopIteration as done:
+        return done.value
+    steps.close()
+    return None
@@ -0,0 +1,82 @@
+# conftest.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+Shared fixtures: random grids written as maze files, and a breadth first
+search over the grid text that the searches are checked against.
+"""
+
+import os
+import sys
+from collections import deque
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import resultcache
+
+# Returns {(row, col): steps} from source to every open cell of grid, a list
+# of strings of the maze file format, reading nothing but the text
+def grid_distances(grid, source):
+    dist = {source: 0}
+    queue = deque([source])
+    while queue:
+        row, col = queue.popleft()
+        for next_row, next_col in ((row + 1, col), (row - 1, col), (row, col + 1), (row, col - 1)):
+            if (0 <= next_row < len(grid) and 0 <= next_col < len(grid[0]) and
+                    grid[next_row][next_col] != '%' and (next_row, next_col) not in dist):
+                dist[(next_row, next_col)] = dist[(row, col)] + 1
+                queue.append((next_row, next_col))
+    return dist
+
+# Returns True if path only takes single steps between open cells of maze
+def is_walk(maze, path):
+    return (not any(maze.isWall(row, col) for row, col in path) and
+            all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:])))
+
+# Returns a random grid of rows x cols open cells, walled in as the maps are
+# (the maze format drops rows of nothing but spaces), with walls at the given
+# density and the start and the objectives on distinct open cells, or None if
+# there are too few
+def random_grid(rng, rows, cols, density, objectives=1):
+    grid = [['%' if row in (0, rows + 1) or col in (0, cols + 1) or rng.random() < density else ' '
+             for col in range(cols + 2)] for row in range(rows + 2)]
+    opens = [(row, col) for row in range(rows + 2) for col in range(cols + 2) if grid[row][col] == ' ']
+    if len(opens) < objectives + 1:
+        return None
+    cells = rng.sample(opens, objectives + 1)
+    grid[cells[0][0]][cells[0][1]] = 'P'
+    for row, col in cells[1:]:
+        grid[row][col] = '.'
+    return [''.join(line) for line in grid]
+
+@pytest.fixture
+def write_grid(tmp_path):
+    count = [0]
+    def write(grid):
+        count[0] += 1
+        filename = str(tmp_path / ('maze%d.txt' % count[0]))
+        with open(filename, 'w') as f:
+            f.write('\n'.join(grid) + '\n')
+        return filename
+    return write
+
+# the tests name the maps relative to the repository
+@pytest.fixture(autouse=True)
+def in_repository(monkeypatch):
+    monkeypatch.chdir(ROOT)
+
+# the result cache is process-wide, and a test that turns it on (the daemon
+# does) must not answer the searches of the tests after it
+@pytest.fixture(autouse=True)
+def no_result_cache():
+    previous = resultcache.default_cache
+    resultcache.default_cache = None
+    yield
+    resultcache.default_cache = previous
@@ -0,0 +1,59 @@
+# test_compiled.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+Compiled mazes load as the text they were compiled from.
+"""
+
+import glob
+import os
+import random
+
+import pytest
+
+import distcache
+import multidot
+import search
+from compiled import compile_maze, load_maze, pack_walls, PACK_BLOCK
+from maze import Maze, BIT_PLANES
+from conftest import ROOT
+
+@pytest.mark.parametrize("filename", sorted(glob.glob(os.path.join(ROOT, "maps", "*.txt"))), ids=os.path.basename)
+def test_round_trip(filename, tmp_path):
+    target = compile_maze(filename, str(tmp_path / "maze.mazeb"), distances=True)
+    text, compiled = Maze(filename), Maze(target)
+    assert (compiled.rows, compiled.cols) == (text.rows, text.cols)
+    assert compiled.getStart() == text.getStart()
+    assert compiled.getObjectives() == text.getObjectives()
+    assert bytes(compiled.getWallMask()) == bytes(text.getWallMask())
+    assert compiled.getContentHash() == text.getContentHash()
+    assert [list(part) for part in compiled.getNeighborTable()] == [list(part) for part in text.getNeighborTable()]
+    cells = multidot.objective_cells(text)
+    dist, legs, expanded = multidot.objective_distances(text, cells)
+    assert distcache.decode(compiled.getEmbeddedDistances(), compiled, cells)[0] == dist
+    assert search.search(compiled, "bfs") == search.search(text, "bfs")
+
+@pytest.mark.parametrize("size", [1, 7, 8, 9, PACK_BLOCK - 1, PACK_BLOCK, PACK_BLOCK + 9, 3 * PACK_BLOCK + 5])
+def test_pack_walls_unpacks_by_bit_plane(size):
+    rng = random.Random(size)
+    walls = bytearray(rng.getrandbits(1) for cell in range(size))
+    packed = bytes(pack_walls(walls))
+    assert len(packed) == (size + 7) // 8
+    unpacked = bytearray(8 * len(packed))
+    for k in range(8):
+        unpacked[k::8] = packed.translate(BIT_PLANES[k])
+    assert unpacked[:size] == walls
+    assert not any(unpacked[size:])
+
+def test_load_maze_compiles_again_when_the_text_changed(tmp_path):
+    source = tmp_path / "maze.txt"
+    source.write_text("%%%%%\n%P .%\n%%%%%\n")
+    compile_maze(str(source))
+    source.write_text("%%%%%%\n%P  .%\n%%%%%%\n")
+    maze = load_maze(str(source))
+    assert (maze.rows, maze.cols) == (3, 6)
+    assert maze.getObjectives() == [(1, 4)]
@@ -0,0 +1,62 @@
+# test_errors.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+A maze that fails to load is reported in the answer for it, by the daemon and
+by headless runs, and the other mazes are still answered.
+"""
+
+import asyncio
+import io
+import json
+
+import pytest
+
+import daemon
+import headless
+from compiled import compile_maze
+
+@pytest.fixture
+def bad_mazes(tmp_path):
+    undecodable = tmp_path / "undecodable.txt"
+    undecodable.write_bytes(b"\xff\xfe%%\n")
+    empty = tmp_path / "empty.txt"
+    empty.write_bytes(b"")
+    compiled = compile_maze("maps/bigMaze.txt", str(tmp_path / "truncated.mazeb"))
+    with open(compiled, "rb") as f:
+        data = f.read()
+    header = tmp_path / "header.mazeb"
+    header.write_bytes(data[:5])
+    with open(compiled, "wb") as f:
+        f.write(data[:len(data) // 2])
+    return [str(undecodable), str(empty), str(header), compiled, str(tmp_path / "missing.txt")]
+
+def test_daemon_answers_load_failures(bad_mazes):
+    async def ask(requests):
+        service = daemon.SearchDaemon(workers=0, resultBytes=0)
+        try:
+            return await asyncio.wait_for(asyncio.gather(*(service.submit(request) for request in requests)), 30)
+        finally:
+            service.inline.shutdown()
+    requests = [{"maze": filename, "method": "bfs"} for filename in bad_mazes]
+    requests.append({"maze": "maps/tinySearch.txt", "method": "bfs"})
+    responses = asyncio.run(ask(requests))
+    for response in responses[:-1]:
+        assert response["error"].startswith("could not load maze: ")
+    assert len(responses[-1]["path"]) == 38
+
+def test_headless_reports_load_failures(bad_mazes):
+    output = io.StringIO()
+    failures = headless.run(bad_mazes + ["maps/tinySearch.txt"], ["bfs", "astar"], workers=1, output=output)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert failures == 2 * len(bad_mazes)
+    assert len(records) == 2 * (len(bad_mazes) + 1)
+    for record in records:
+        if record["maze"] in bad_mazes:
+            assert record["error"].startswith("could not load maze: ")
+        else:
+            assert "error" not in record and record["path_length"] == 38
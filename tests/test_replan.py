@@ -0,0 +1,66 @@
+# test_replan.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+The D* Lite planner against a breadth first search from scratch while the
+start moves and walls and objectives change under it.
+"""
+
+import random
+
+import pytest
+
+from maze import Maze
+from replan import IncrementalPlanner
+from conftest import grid_distances, is_walk, random_grid
+
+# the grid text of maze as its walls are now
+def current_grid(maze):
+    return [''.join('%' if maze.isWall(row, col) else ' ' for col in range(maze.cols)) for row in range(maze.rows)]
+
+def test_replanning_matches_breadth_first_search(write_grid):
+    rng = random.Random(5)
+    for trial in range(60):
+        grid = random_grid(rng, rng.randint(3, 14), rng.randint(3, 14), 0.2, rng.randint(1, 3))
+        if grid is None:
+            continue
+        maze = Maze(write_grid(grid))
+        planner = IncrementalPlanner(maze)
+        inside = [(row, col) for row in range(1, maze.rows - 1) for col in range(1, maze.cols - 1)]
+        for step in range(25):
+            path, statesExplored = planner.plan()
+            start = maze.getCellPos(planner.start)
+            dist = grid_distances(current_grid(maze), start)
+            reachable = [dist[objective] for objective in maze.getObjectives() if objective in dist]
+            if not reachable:
+                assert path == []
+            else:
+                assert path[0] == start and path[-1] in maze.getObjectives()
+                assert is_walk(maze, path)
+                assert len(path) == min(reachable) + 1
+            action = rng.random()
+            if action < 0.4 and len(path) > 1:
+                planner.move_start(path[1])
+            elif action < 0.8:
+                row, col = rng.choice(inside)
+                if (row, col) != start:
+                    planner.set_wall(row, col, not maze.isWall(row, col))
+            else:
+                objectives = rng.sample([cell for cell in inside if not maze.isWall(cell[0], cell[1])], 2)
+                maze.setObjectives(objectives)
+                planner.set_objectives(objectives)
+
+@pytest.mark.parametrize("position", [(-1, 2), (2, -1), (5, 2), (2, 6)])
+def test_walls_outside_the_maze_are_rejected(write_grid, position):
+    maze = Maze(write_grid(["%%%%%%", "%P  .%", "%    %", "%    %", "%%%%%%"]))
+    planner = IncrementalPlanner(maze)
+    walls = bytes(maze.getWallMask())
+    with pytest.raises(IndexError):
+        planner.set_wall(position[0], position[1], True)
+    with pytest.raises(IndexError):
+        maze.setWall(position[0], position[1], True)
+    assert bytes(maze.getWallMask()) == walls
@@ -0,0 +1,50 @@
+# test_shortest.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+The shortest path methods against a breadth first search of the grid text,
+on random grids with and without a way to the objective.
+"""
+
+import random
+
+import pytest
+
+import search
+from maze import Maze
+from resultcache import SHORTEST_METHODS
+from conftest import grid_distances, is_walk, random_grid
+
+@pytest.mark.parametrize("method", SHORTEST_METHODS)
+def test_shortest_on_random_grids(method, write_grid):
+    rng = random.Random(method)
+    unreachable = 0
+    for trial in range(150):
+        grid = random_grid(rng, rng.randint(1, 12), rng.randint(1, 12), rng.random() * 0.45)
+        if grid is None:
+            continue
+        maze = Maze(write_grid(grid))
+        start, goal = maze.getStart(), maze.getObjectives()[0]
+        expected = grid_distances(grid, start).get(goal)
+        path, statesExplored = search.search(maze, method)
+        if expected is None:
+            unreachable += 1
+            assert path == []
+            continue
+        assert path[0] == start and path[-1] == goal
+        assert is_walk(maze, path)
+        assert len(path) == expected + 1
+    assert unreachable > 0
+
+@pytest.mark.parametrize("method", SHORTEST_METHODS)
+def test_shortest_on_maps(method):
+    for name in ("mediumMaze", "bigMaze", "openMaze"):
+        maze = Maze("maps/%s.txt" % name)
+        with open("maps/%s.txt" % name) as f:
+            grid = f.read().splitlines()
+        path, statesExplored = search.search(maze, method)
+        assert len(path) == grid_distances(grid, maze.getStart())[maze.getObjectives()[0]] + 1
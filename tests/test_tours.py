@@ -0,0 +1,58 @@
+# test_tours.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+Multi-objective astar against the best order of the objectives found by
+trying every one, and the answer of every method when an objective cannot be
+reached.
+"""
+
+import itertools
+import random
+
+import search
+from maze import Maze
+from conftest import grid_distances, is_walk, random_grid
+
+# the length of the shortest walk from start through every objective, trying
+# every order, or None if an objective cannot be reached
+def brute_force_tour(grid, start, objectives):
+    dist = {cell: grid_distances(grid, cell) for cell in [start] + objectives}
+    if any(objective not in dist[start] for objective in objectives):
+        return None
+    return min(sum(dist[a][b] for a, b in zip((start,) + order, order))
+               for order in itertools.permutations(objectives))
+
+def test_astar_tours_are_optimal(write_grid):
+    rng = random.Random(3)
+    checked = 0
+    for trial in range(120):
+        grid = random_grid(rng, rng.randint(3, 10), rng.randint(3, 10), rng.random() * 0.3, rng.randint(2, 6))
+        if grid is None:
+            continue
+        maze = Maze(write_grid(grid))
+        objectives = maze.getObjectives()
+        best = brute_force_tour(grid, maze.getStart(), objectives)
+        if best is None:
+            continue
+        path, statesExplored = search.search(maze, "astar")
+        assert path[0] == maze.getStart()
+        assert is_walk(maze, path)
+        assert set(objectives) <= set(path)
+        assert len(path) == best + 1
+        checked += 1
+    assert checked > 50
+
+def test_unreachable_objective_gives_empty_path(write_grid):
+    # the objective at the right is walled off from the start
+    grid = ["%%%%%%%%",
+            "%P . % %",
+            "%  . %.%",
+            "%%%%%%%%"]
+    for method in ("bfs", "dfs", "greedy", "astar"):
+        maze = Maze(write_grid(grid))
+        assert search.search(maze, method)[0] == [], method
@@ -0,0 +1,170 @@
+# wavefront.py
+# ---------------
+# Licensing Information:  You are free to use or extend this projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to the University of Illinois at Urbana-Champaign
+
+"""
+This file contains distance_field, a whole-grid breadth first search. The grid
+is held as arbitrary precision integers used as bitsets, one row of cols + 1
+bits after another (the last bit of a row is always closed, so shifts by one
+do not wrap), and each wavefront step is a few shifts, ands and ors over the
+cells up to the front instead of a per-cell neighbor loop.
+
+Every step still costs time in proportion to the grid, so the whole search
+grows as cells times depth and only wins while the grid is small. Against
+multidot.bfs_distances, from one corner of a random field:
+
+    size        distances only      with parents
+    300x300     0.03s vs 0.06s      0.04s vs 0.06s
+    1000x1000   0.45s vs 0.95s      1.22s vs 0.95s
+    2000x2000   4.7s vs 4.1s        9.9s vs 4.1s
+
+At a wall density of 0.2 the margins are smaller (0.53s vs 0.73s at
+1000x1000 for distances only, 3.6s vs 3.0s at 2000x2000). On corridor mazes
+the search is deep and narrow, and bfs_distances is the better tool, as it is
+whenever a search can stop at its targets. Nothing in the tree calls this.
+"""
+
+from array import array
+import sys
+
+# direction codes of the step from a parent into a cell, in the order
+# Maze.getNeighbors lists neighbors: down, up, right, left
+DOWN, UP, RIGHT, LEFT = 0, 1, 2, 3
+
+# bytes.translate tables mapping b'0'/b'1' to 0/value
+_SPREAD = [bytes.maketrans(b'01', bytes([0, value])) for value in range(256)]
+
+# turns a per-cell byte string of b'0'/b'1' into a bitset (bit i = cell i)
+def _bitset(flags):
+    return int(flags[::-1], 2) if flags else 0
+
+# the inverse of _bitset: one byte per cell, value where the bit is set and 0
+# elsewhere
+def _spread(bits, size, value):
+    flags = format(bits, '0%db' % size)[::-1].encode('ascii')
+    return flags.translate(_SPREAD[value])
+
+# packs bit planes (plane k holds the cells whose value has bit k set) into
+# one little endian word of width bytes per cell
+def _pack(planes, size, width):
+    buf = bytearray(size * width)
+    for lane in range(width):
+        word = 0
+        for k in range(lane * 8, lane * 8 + 8):
+            if planes[k]:
+                word |= int.from_bytes(_spread(planes[k], size, 1 << (k - lane * 8)), 'little')
+        buf[lane::width] = word.to_bytes(size, 'little')
+    return buf
+
+# low bits of a depth ORed into their planes at every step; the higher bits
+# only change every 2 ** LOW_PLANES steps, so the fronts are collected over
+# that many steps and ORed into the higher planes once
+LOW_PLANES = 4
+
+# returns the open cells of the maze as a bitset over rows of cols + 1 bits,
+# each row followed by a closed bit, so that a shift by one never steps from
+# the end of one row into the next
+def open_cells(maze):
+    rows, cols = maze.rows, maze.cols
+    flags = maze.getWallMask().translate(bytes.maketrans(b'\x00\x01', b'10'))
+    padded = bytearray(b'0' * (rows * (cols + 1)))
+    for row in range(rows):
+        start = row * (cols + 1)
+        padded[start:start + cols] = flags[row * cols:(row + 1) * cols]
+    return _bitset(bytes(padded))
+
+# drops the padding cell of every row from width bytes per cell
+def _unpad(buf, rows, cols, width):
+    stride = (cols + 1) * width
+    return b''.join(buf[row * stride:row * stride + cols * width] for row in range(rows))
+
+# Computes the maze distance from the nearest of sources (a list of (row, col)
+# positions) to every cell. returns (dist, parents): dist is an int32 array
+# indexed by cell id holding -1 for unreachable cells, and parents is None
+# unless with_parents is set, in which case it is a signed byte array holding
+# the direction code of the step from each cell's parent into it (-1 for
+# sources and unreachable cells).
+# distances are never written per cell while the wave runs: each depth is ORed
+# into the bit planes of its binary representation, and the planes are packed
+# into the int32 array once at the end
+def distance_field(maze, sources, with_parents=False):
+    rows, cols = maze.rows, maze.cols
+    width = cols + 1
+    size = rows * width
+    openCells = open_cells(maze)
+    unvisited = openCells
+
+    front = 0
+    for row, col in sources:
+        cell = row * width + col
+        if 0 <= row < rows and 0 <= col < cols and unvisited >> cell & 1:
+            front |= 1 << cell
+    seeds = front
+    unvisited ^= front
+    planes = [0] * 32
+    parentPlanes = [0] * 8
+    collected = 0
+    depth = 0
+    while front:
+        depth += 1
+        if with_parents:
+            moves = (
+                (front << width) & unvisited,
+                (front >> width) & unvisited,
+                (front << 1) & unvisited,
+                (front >> 1) & unvisited,
+            )
+            front = moves[DOWN] | moves[UP] | moves[RIGHT] | moves[LEFT]
+            # a cell reached from several sides keeps the first in
+            # getNeighbors order
+            claimed = moves[DOWN]
+            up = moves[UP] & ~claimed
+            claimed |= up
+            right = moves[RIGHT] & ~claimed
+            left = moves[LEFT] & ~(claimed | right)
+            parentPlanes[0] |= up | left
+            parentPlanes[1] |= right | left
+        else:
+            front = ((front << width) | (front >> width) | (front << 1) | (front >> 1)) & unvisited
+        # front lies within unvisited, so this takes it out
+        unvisited ^= front
+        for k in range(LOW_PLANES):
+            if depth >> k & 1:
+                planes[k] |= front
+        collected |= front
+        if depth % (1 << LOW_PLANES) == (1 << LOW_PLANES) - 1 or not front:
+            for k in range(LOW_PLANES, depth.bit_length()):
+                if depth >> k & 1:
+                    planes[k] |= collected
+            collected = 0
+
+    # -1 is every bit set. the padding bits are dropped with the padding
+    unreached = unvisited | (openCells ^ ((1 << size) - 1))
+    dist = array('i')
+    dist.frombytes(_unpad(_pack([plane | unreached for plane in planes], size, 4), rows, cols, 4))
+    if sys.byteorder == 'big':
+        dist.byteswap()
+    parents = None
+    if with_parents:
+        none = unreached | seeds
+        parents = array('b')
+        parents.frombytes(_unpad(_pack([plane | none for plane in parentPlanes], size, 1), rows, cols, 1))
+    return dist, parents
+
+# Follows the arrays from distance_field back from (row, col) to its nearest
+# source. returns the path as (row, col) tuples starting at the source, or []
+# if the cell was not reached
+def path_from_field(maze, dist, parents, row, col):
+    cols = maze.cols
+    steps = (cols, -cols, 1, -1)
+    cell = row * cols + col
+    if not maze.isValidMove(row, col) or dist[cell] < 0:
+        return []
+    path = [cell]
+    while parents[cell] >= 0:
+        cell -= steps[parents[cell]]
+        path.append(cell)
+    return [maze.getCellPos(cell) for cell in reversed(path)]